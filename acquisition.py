@@ -0,0 +1,109 @@
+import threading
+import time
+
+
+class LatestSample:
+    """Ячейка с самым свежим отсчётом.
+
+    Писатель заменяет ссылку на кортеж (время, значение) одним присваиванием,
+    которое в CPython атомарно, поэтому читатель никогда не ждёт блокировку
+    и всегда видит согласованную пару.
+    """
+
+    def __init__(self):
+        self._sample = None
+
+    def put(self, timestamp, value):
+        self._sample = (timestamp, value)
+
+    def get(self):
+        """(время, значение) или None, если отсчётов ещё не было."""
+        return self._sample
+
+
+class AcquisitionThread(threading.Thread):
+    """Фоновый опрос одного эндпоинта робота.
+
+    fetch - функция без аргументов, возвращающая последовательность чисел
+    или None при сбое (как fetch_odometry / read_proximity_sensors).
+    """
+
+    def __init__(self, fetch, period, name=None):
+        super().__init__(name=name, daemon=True)
+        self.fetch = fetch
+        self.period = period
+        self.latest = LatestSample()
+        self.failures = 0
+        self._stop_event = threading.Event()
+        self._first = threading.Event()
+
+    def run(self):
+        next_poll = time.monotonic()
+        while not self._stop_event.is_set():
+            value = self.fetch()
+            timestamp = time.monotonic()
+            if value is None:
+                self.failures += 1
+            else:
+                self.latest.put(timestamp, value)
+                self._first.set()
+            # Опрос не чаще периода; если запрос был дольше - сразу следующий
+            next_poll = max(next_poll + self.period, timestamp)
+            self._stop_event.wait(max(next_poll - time.monotonic(), 0.0))
+
+    def wait_first(self, timeout):
+        """Ожидание первого успешного отсчёта; True, если он получен."""
+        return self._first.wait(timeout)
+
+    def fresh(self, max_age):
+        """Значение последнего отсчёта, если он не старше max_age секунд, иначе None."""
+        sample = self.latest.get()
+        if sample is None or time.monotonic() - sample[0] > max_age:
+            return None
+        return sample[1]
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class CommandSender(threading.Thread):
+    """Фоновая отправка уставок omnidrive.
+
+    Цикл управления только кладёт последнюю уставку (submit) и не ждёт
+    POST; поток отправляет её, когда предыдущий запрос завершился.
+    Устаревшие уставки не копятся: неотправленная заменяется новой
+    (счётчик skipped). send - блокирующая отправка (vx, vy, omega).
+    """
+
+    def __init__(self, send, name="omnidrive"):
+        super().__init__(name=name, daemon=True)
+        self.send = send
+        self.skipped = 0  # Уставки, заменённые более свежими до отправки
+        self._pending = None
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._stop_event = threading.Event()
+
+    def submit(self, vx, vy, omega=0):
+        with self._lock:
+            if self._pending is not None:
+                self.skipped += 1
+            self._pending = (vx, vy, omega)
+        self._event.set()
+
+    def run(self):
+        while True:
+            self._event.wait()
+            with self._lock:
+                command, self._pending = self._pending, None
+                self._event.clear()
+            if command is not None:
+                self.send(*command)
+            # Остановка - только когда новых уставок не осталось (stop мог прийти во время POST)
+            if self._stop_event.is_set() and self._pending is None:
+                break
+
+    def stop(self):
+        """Отправить уже поставленную уставку и завершить поток (после join - можно stop())."""
+        self._stop_event.set()
+        self._event.set()
@@ -0,0 +1,172 @@
+import asyncio
+import math
+import os
+import time
+
+import main
+from controller_cache import load_controller
+from robot_client import LatencyStats
+from profiler import PROFILER
+from sensor_filter import SensorFilter
+from command_shaper import CommandShaper
+import telemetry
+from telemetry import TelemetryRecorder
+
+
+class FixedRateScheduler:
+    """Планировщик тактов с фиксированной частотой.
+
+    Сроки тактов отсчитываются от старта (t0 + k * period), а не от конца
+    предыдущей итерации, поэтому задержки не накапливаются. Для каждого
+    такта запоминается дрейф - насколько позже срока цикл проснулся.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.drift = LatencyStats()
+        self.missed = 0  # Такты, пропущенные из-за перегрузки
+        self._deadline = None
+
+    async def wait(self):
+        """Ожидание срока следующего такта."""
+        now = time.perf_counter()
+        if self._deadline is None:
+            self._deadline = now
+        else:
+            self._deadline += self.period
+            if now - self._deadline > self.period:
+                # Цикл отстал больше чем на такт - не догоняем пачкой, а пропускаем сроки
+                skipped = int((now - self._deadline) // self.period)
+                self.missed += skipped
+                self._deadline += skipped * self.period
+            await asyncio.sleep(max(self._deadline - time.perf_counter(), 0.0))
+        self.drift.add(time.perf_counter() - self._deadline)
+
+    def report(self):
+        return (f"Дрейф такта: среднее {self.drift.mean * 1e3:.2f} мс, "
+                f"макс {self.drift.max * 1e3:.2f} мс; тактов {self.drift.count}, "
+                f"пропущено {self.missed}")
+
+
+class VelocitySender:
+    """Неблокирующая отправка уставок omnidrive.
+
+    Цикл управления только кладёт последнюю уставку; отдельная задача
+    отправляет её, когда предыдущий POST завершился. Устаревшие уставки
+    не копятся в очереди. send - блокирующая отправка (vx, vy, omega),
+    по умолчанию main.set_movement_velocity.
+    """
+
+    def __init__(self, send=None):
+        self.send = send or main.set_movement_velocity
+        self._pending = None
+        self._event = asyncio.Event()
+        self._inflight = None
+        self.skipped = 0  # Уставки, заменённые более свежими до отправки
+
+    def submit(self, vx, vy, omega=0):
+        if self._pending is not None:
+            self.skipped += 1
+        self._pending = (vx, vy, omega)
+        self._event.set()
+
+    async def run(self):
+        while True:
+            await self._event.wait()
+            self._event.clear()
+            command, self._pending = self._pending, None
+            self._inflight = asyncio.ensure_future(
+                asyncio.to_thread(self.send, *command))
+            await asyncio.shield(self._inflight)
+
+    async def drain(self):
+        """Дождаться уже отправляемой уставки, чтобы она не пришла роботу после stop()."""
+        if self._inflight is not None:
+            await asyncio.gather(self._inflight, return_exceptions=True)
+
+
+async def async_main_control_loop(period=main.CONTROL_PERIOD):
+    """Главный цикл управления на asyncio.
+
+    Одометрия и датчики запрашиваются параллельно, уставка отправляется
+    без ожидания ответа, такты идут по FixedRateScheduler.
+    """
+    POINT_TOLERANCE = 0.02
+    telemetry.set_log_level(main.LOG_LEVEL)
+    PROFILER.enabled = main.PROFILE
+    nav = load_controller()  # Движки NumPy из кэша, без сборки skfuzzy на старте
+    robot_connection = await asyncio.to_thread(main.CONNECT)
+
+    if not robot_connection:
+        print("Невозможно подключиться!")
+        return
+
+    sender = VelocitySender()
+    sender_task = asyncio.create_task(sender.run())
+    # Формирователь перед отправителем: в очередь попадают только изменившиеся уставки
+    shaper = CommandShaper(sender.submit) if main.COMMAND_SHAPING else CommandShaper.changes_only(sender.submit)
+    scheduler = FixedRateScheduler(period)
+    read_sensors = SensorFilter.default().wrap(main.read_proximity_sensors) if main.SENSOR_FILTER else main.read_proximity_sensors
+    recorder = None
+    if main.TELEMETRY_DIR:
+        recorder = TelemetryRecorder(os.path.join(main.TELEMETRY_DIR, time.strftime("%Y%m%d-%H%M%S")))
+
+    try:
+        odom_init = await asyncio.to_thread(main.fetch_odometry)
+        if not odom_init:
+            return
+
+        base_x, base_y = odom_init[0], odom_init[1]
+
+        while True:
+            await scheduler.wait()
+            # Два GET-запроса одновременно: такт ждёт самый медленный, а не их сумму
+            current_odom, sensors = await asyncio.gather(
+                asyncio.to_thread(main.fetch_odometry),
+                asyncio.to_thread(read_sensors),
+            )
+            if not current_odom or not sensors:
+                continue
+
+            current_x = current_odom[0] - base_x
+            current_y = current_odom[1] - base_y
+            delta_x, delta_y = main.calculate_position_offset(current_x, current_y)
+            with PROFILER.stage('compute'):
+                vx, vy = nav.calculate_velocity(delta_x, delta_y, *sensors)
+
+            if math.hypot(delta_x, delta_y) <= POINT_TOLERANCE:
+                print("Задача выполнена")
+                break
+
+            vx = max(min(vx, main.MAX_VELOCITY), -main.MAX_VELOCITY)
+            vy = max(min(vy, main.MAX_VELOCITY), -main.MAX_VELOCITY)
+            if recorder is not None:
+                recorder.record(time.monotonic(), current_odom, sensors,
+                                delta_x, delta_y, nav.last_branch, vx, vy)
+            shaper(time.monotonic(), vx, vy, 0)
+
+    except asyncio.CancelledError:
+        print("Прервано пользователем.")
+    finally:
+        sender_task.cancel()
+        await sender.drain()
+        main.stop()
+        if recorder is not None:
+            recorder.close()
+            print(f"Телеметрия: {recorder.count} тактов в {recorder.path}, потеряно {recorder.dropped}")
+        print(scheduler.report())
+        print(f"Уставок заменено до отправки: {sender.skipped}")
+        print(shaper.report())
+        for line in robot_connection.report():
+            print(line)
+        if PROFILER.enabled:
+            for line in PROFILER.report():
+                print(line)
+        robot_connection.close()
+
+
+def run():
+    try:
+        asyncio.run(async_main_control_loop())
+    except KeyboardInterrupt:
+        pass
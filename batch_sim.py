@@ -0,0 +1,161 @@
+"""Векторизованный симулятор: N независимых роботов за один шаг.
+
+Каждый сценарий - свой набор спутников вокруг цели. Все роботы
+шагают вместе, контроллер вызывается через calculate_velocity_batch.
+
+Запуск: python batch_sim.py --episodes 10000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from robot_geometry import ROBOT_RADIUS, SENSOR_ANGLES
+from simulator import group_sensors, raycast
+
+
+class BatchSimulator:
+    """Пакет сценариев на массивах NumPy.
+
+    Параметры орбит - массивы формы (N, M): N сценариев по M спутников.
+    target - (N, 2) или одна точка для всех сценариев.
+    """
+
+    def __init__(self, nav, target, orbit_radius, angular_speed, phase, radius):
+        self.nav = nav
+        self.orbit_radius = np.asarray(orbit_radius, dtype=float)
+        self.angular_speed = np.asarray(angular_speed, dtype=float)
+        self.phase = np.asarray(phase, dtype=float)
+        self.radius = np.asarray(radius, dtype=float)
+        n = len(self.orbit_radius)
+        self.target = np.broadcast_to(np.asarray(target, dtype=float), (n, 2)).copy()
+
+    @classmethod
+    def random(cls, nav, count, target=(0.5, 0.5), satellites=3, seed=0):
+        """Случайные сценарии с теми же распределениями, что Satellites.random."""
+        rng = np.random.default_rng(seed)
+        shape = (count, satellites)
+        return cls(nav, target,
+                   orbit_radius=rng.uniform(0.35, 0.45, shape),
+                   angular_speed=rng.uniform(0.15, 0.4, shape) * rng.choice([-1, 1], shape),
+                   phase=rng.uniform(0, 2 * np.pi, shape),
+                   radius=rng.uniform(0.03, 0.06, shape))
+
+    def __len__(self):
+        return len(self.target)
+
+    def _satellites(self, idx, t):
+        """Центры спутников сценариев idx в момент t: (k, M, 2)."""
+        angle = self.phase[idx] + self.angular_speed[idx] * t
+        r = self.orbit_radius[idx]
+        return self.target[idx, np.newaxis, :] + np.stack(
+            [r * np.cos(angle), r * np.sin(angle)], axis=-1)
+
+    def _sensors(self, idx, pose, t):
+        """9 показаний ИК-датчиков для роботов idx: (k, 9)."""
+        angles = pose[:, 2:3] + SENSOR_ANGLES
+        directions = np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+        origins = pose[:, np.newaxis, :2] + ROBOT_RADIUS * directions
+        return raycast(origins, directions, self._satellites(idx, t), self.radius[idx])
+
+    def _clearance(self, idx, pose, t):
+        """Зазор между корпусом робота и ближайшим спутником: (k,)."""
+        gaps = (np.linalg.norm(self._satellites(idx, t) - pose[:, np.newaxis, :2], axis=-1)
+                - ROBOT_RADIUS - self.radius[idx])
+        return gaps.min(axis=1)
+
+    def run(self, max_time=30.0, period=0.02, tolerance=0.02, max_velocity=0.1):
+        """Прогон всех сценариев до цели или max_time.
+
+        Возвращает словарь массивов по сценариям: success, reached,
+        time (время до цели, NaN если не дошёл), min_clearance, collisions,
+        а также states - сколько состояний прошло через контроллер.
+        """
+        n = len(self)
+        pose = np.zeros((n, 3))
+        reached = np.zeros(n, dtype=bool)
+        arrival = np.full(n, np.nan)
+        min_clearance = np.full(n, np.inf)
+        collisions = np.zeros(n, dtype=int)
+        in_contact = np.zeros(n, dtype=bool)
+        active = np.arange(n)
+        states = 0
+        t = 0.0
+
+        while len(active) and t < max_time:
+            p = pose[active]
+            dx = self.target[active, 0] - p[:, 0]
+            dy = self.target[active, 1] - p[:, 1]
+
+            done = np.hypot(dx, dy) <= tolerance
+            if done.any():
+                reached[active[done]] = True
+                arrival[active[done]] = t
+                keep = ~done
+                active, p, dx, dy = active[keep], p[keep], dx[keep], dy[keep]
+                if not len(active):
+                    break
+
+            sensors = group_sensors(self._sensors(active, p, t))
+            vx, vy = self.nav.calculate_velocity_batch(dx, dy, sensors)
+            states += len(active)
+            vx = np.clip(vx, -max_velocity, max_velocity)
+            vy = np.clip(vy, -max_velocity, max_velocity)
+
+            # Скорость постоянна в пределах такта - интегрируем одним шагом
+            cos, sin = np.cos(p[:, 2]), np.sin(p[:, 2])
+            p[:, 0] += period * (cos * vx - sin * vy)
+            p[:, 1] += period * (sin * vx + cos * vy)
+            pose[active] = p
+            t += period
+
+            clearance = self._clearance(active, p, t)
+            contact = clearance < 0
+            collisions[active] += contact & ~in_contact[active]
+            in_contact[active] = contact
+            min_clearance[active] = np.minimum(min_clearance[active], clearance)
+
+        return {
+            'success': reached & (collisions == 0),
+            'reached': reached,
+            'time': arrival,
+            'min_clearance': min_clearance,
+            'collisions': collisions,
+            'states': states,
+        }
+
+
+def summarize(result):
+    """Сводка по пакету: доля успехов, среднее время до цели, зазоры."""
+    reached = result['reached']
+    return {
+        'episodes': len(reached),
+        'success_rate': float(result['success'].mean()),
+        'reach_rate': float(reached.mean()),
+        'mean_time': float(np.nanmean(result['time'])) if reached.any() else float('nan'),
+        'mean_min_clearance': float(np.mean(result['min_clearance'])),
+        'collision_rate': float((result['collisions'] > 0).mean()),
+    }
+
+
+if __name__ == "__main__":
+    from navigation import NavigationController
+
+    parser = argparse.ArgumentParser(description="Пакетная оценка контроллера")
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--max-time', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    nav = NavigationController(backend='numpy')
+    sim = BatchSimulator.random(nav, args.episodes, seed=args.seed)
+    start = time.perf_counter()
+    result = sim.run(max_time=args.max_time)
+    elapsed = time.perf_counter() - start
+    stats = summarize(result)
+    print(f"Эпизодов: {stats['episodes']} за {elapsed:.1f} с "
+          f"({result['states'] / elapsed:,.0f} состояний/с)")
+    print(f"Успех: {stats['success_rate']:.1%}, дошли: {stats['reach_rate']:.1%}, "
+          f"среднее время до цели: {stats['mean_time']:.1f} с, "
+          f"столкновения: {stats['collision_rate']:.1%}, "
+          f"средний мин. зазор: {stats['mean_min_clearance']:.3f} м")
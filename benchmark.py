@@ -0,0 +1,269 @@
+"""Замеры производительности нечёткого контроллера и цикла управления.
+
+Запуск: python benchmark.py
+        python benchmark.py --save baseline.json      # сохранить эталон
+        python benchmark.py --compare baseline.json   # код возврата 1 при регрессии
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from navigation import NavigationController
+from profiler import PROFILER
+import telemetry
+
+ENGINE_TOLERANCE = 1e-9  # Допустимое расхождение движка NumPy и skfuzzy (м/с)
+REGRESSION_TOLERANCE = 0.25  # Замедление относительно эталона, считающееся регрессией
+LOOP_TICKS = 1500  # Лимит тактов bench_control_loop: 30 с симуляции при 50 Гц, цель достигается не всегда
+
+
+def random_states(count, seed=0):
+    """Случайные состояния (dx, dy, 7 сенсоров) в рабочем диапазоне."""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(-0.6, 0.6, (count, 2)),
+        rng.uniform(0.0, NavigationController.SENSOR_LIMIT, (count, 7)),
+    ])
+
+
+def time_per_call(func, count, repeat=3):
+    """Лучшее из repeat среднее время одного вызова func(*state), с.
+
+    Каждый повтор идёт на новых состояниях: ControlSystemSimulation кэширует
+    уже посчитанные входы, а на реальном роботе входы каждый такт новые.
+    """
+    best = float('inf')
+    for seed in range(repeat):
+        states = random_states(count, seed=seed + 1)
+        start = time.perf_counter()
+        for state in states:
+            func(*state)
+        best = min(best, (time.perf_counter() - start) / len(states))
+    return best
+
+
+def bench_backends(count=200):
+    """Задержка одного такта: skfuzzy против MamdaniEngine."""
+    states = random_states(count)
+    reference = NavigationController(backend='skfuzzy')
+    numpy_nav = NavigationController(backend='numpy')
+
+    goal_dev = numpy_nav.goal_engine.max_deviation(reference.goal_sim, states[:, :2])
+    obstacle_dev = numpy_nav.obstacle_engine.max_deviation(reference.obstacle_sim, states)
+    if max(goal_dev, obstacle_dev) > ENGINE_TOLERANCE:
+        raise AssertionError(
+            f"Расхождение с skfuzzy: goal={goal_dev:.3g}, obstacle={obstacle_dev:.3g}")
+
+    def obstacle_call(nav):
+        labels = NavigationController.SENSOR_LABELS
+        return lambda dx, dy, *s: nav._avoid_obstacles(dy, dx, dict(zip(labels, s)))
+
+    rows = []
+    for name, nav in (('skfuzzy', reference), ('numpy', numpy_nav)):
+        goal = time_per_call(lambda dx, dy, *s: nav._move_to_target(dx, dy), count)
+        obstacle = time_per_call(obstacle_call(nav), count)
+        rows.append((name, goal, obstacle))
+
+    print(f"Макс. расхождение с skfuzzy: goal {goal_dev:.2e}, obstacle {obstacle_dev:.2e}")
+    print(f"{'движок':<10}{'goal, мс':>12}{'obstacle, мс':>16}")
+    for name, goal, obstacle in rows:
+        print(f"{name:<10}{goal * 1e3:>12.3f}{obstacle * 1e3:>16.3f}")
+    base = rows[0]
+    for name, goal, obstacle in rows[1:]:
+        print(f"Ускорение {name}: goal x{base[1] / goal:.1f}, obstacle x{base[2] / obstacle:.1f}")
+    return rows
+
+
+def bench_batch(count=20000, single=300):
+    """Пропускная способность calculate_velocity_batch, состояний в секунду."""
+    nav = NavigationController(backend='numpy')
+    states = random_states(count)
+    # Примерно половина состояний - с препятствием, чтобы нагрузить обе ветки
+    states[::2, 2:] = np.maximum(states[::2, 2:], NavigationController.OBSTACLE_THRESHOLD)
+
+    start = time.perf_counter()
+    vx, vy = nav.calculate_velocity_batch(states[:, 0], states[:, 1], states[:, 2:])
+    batch_rate = count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    singles = [nav.calculate_velocity(*state) for state in states[:single]]
+    single_rate = single / (time.perf_counter() - start)
+
+    deviation = np.abs(np.array(singles) - np.column_stack([vx, vy])[:single]).max()
+    print(f"Пакетный режим: {batch_rate:,.0f} состояний/с, "
+          f"поштучно: {single_rate:,.0f} состояний/с (x{batch_rate / single_rate:.1f}), "
+          f"расхождение {deviation:.1e}")
+    return batch_rate, single_rate
+
+
+def random_rules(nav, count, seed=0):
+    """count случайных правил обхода над переменными nav (для замера масштабирования).
+
+    Каждое правило - AND 2-4 термов датчиков (dangeros/safe) и иногда
+    терма позиции, следствия - по терму velocity_x и velocity_y.
+    """
+    from skfuzzy import control as ctrl
+
+    rng = np.random.default_rng(seed)
+    sensors = [getattr(nav, f'sensor_{label}') for label in nav.SENSOR_LABELS]
+    positions = [nav.position_x, nav.position_y]
+    rules = []
+    for _ in range(count):
+        picked = rng.choice(len(sensors), size=rng.integers(2, 5), replace=False)
+        terms = [sensors[i][rng.choice(['dangeros', 'safe'])] for i in picked]
+        if rng.random() < 0.3:
+            var = positions[rng.integers(2)]
+            terms.append(var[rng.choice(list(var.terms))])
+        antecedent = terms[0]
+        for term in terms[1:]:
+            antecedent = antecedent & term
+        rules.append(ctrl.Rule(antecedent, (
+            nav.velocity_x[rng.choice(list(nav.velocity_x.terms))],
+            nav.velocity_y[rng.choice(list(nav.velocity_y.terms))],
+        )))
+    return rules
+
+
+def bench_rule_scaling(counts=(13, 50, 100, 200, 400), calls=300):
+    """Время одного вывода при росте числа правил: все правила против active_rules."""
+    from fuzzy_numpy import MamdaniEngine
+
+    nav = NavigationController(backend='numpy')
+    states = random_states(calls, seed=7)
+    rows = []
+    for count in counts:
+        rules = nav.obstacle_rules if count == len(nav.obstacle_rules) else random_rules(nav, count)
+        engine = MamdaniEngine.from_rules(rules, nav.OBSTACLE_INPUTS, nav.OUTPUTS)
+        timings = {}
+        outputs = {}
+        for sparse in (False, True):
+            engine.sparse = sparse
+            outputs[sparse] = engine.compute_batch(states)
+            timings[sparse] = time_per_call(engine.compute, calls)
+        if not np.array_equal(outputs[False], outputs[True], equal_nan=True):
+            raise AssertionError(f"Разреженный вывод отличается при {count} правилах")
+        active = np.mean([len(engine.active_rules(engine.fuzzify(state[np.newaxis])))
+                          for state in states])
+        rows.append((count, active, timings[False], timings[True]))
+
+    print(f"{'правил':>7}{'активных':>10}{'все, мс':>10}{'активные, мс':>14}")
+    for count, active, full, sparse in rows:
+        print(f"{count:>7}{active:>10.1f}{full * 1e3:>10.3f}{sparse * 1e3:>14.3f}  x{full / sparse:.1f}")
+    return rows
+
+
+def bench_sensor_filter(count=20000, spike_rate=0.05, seed=0):
+    """Время фильтра датчиков на отсчёт и доля пропущенных выбросов.
+
+    Сигнал - медленно меняющиеся расстояния с одиночными выбросами в ноль
+    (ложное препятствие) с вероятностью spike_rate на датчик.
+    """
+    from sensor_filter import SensorFilter
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(count)[:, None]
+    clean = 0.35 + 0.05 * np.sin(t / 200.0 + np.arange(7))
+    spikes = rng.random(clean.shape) < spike_rate
+    noisy = np.where(spikes, 0.0, clean)
+    threshold = NavigationController.OBSTACLE_THRESHOLD
+
+    sensor_filter = SensorFilter.default()
+    samples = noisy.tolist()
+    filtered = np.empty_like(noisy)
+    start = time.perf_counter()
+    for i, sample in enumerate(samples):
+        filtered[i] = sensor_filter(sample)
+    per_sample = (time.perf_counter() - start) / count
+
+    raw_false = (noisy < threshold).any(axis=1) & ~(clean < threshold).any(axis=1)
+    filtered_false = (filtered < threshold).any(axis=1) & ~(clean < threshold).any(axis=1)
+    print(f"Фильтр датчиков: {per_sample * 1e6:.1f} мкс/отсчёт, ложных срабатываний "
+          f"обхода {raw_false.sum()} -> {filtered_false.sum()} из {count}")
+    return per_sample
+
+
+def bench_control_loop(seed=0, max_ticks=LOOP_TICKS):
+    """main_control_loop против локального симулятора с замером этапов такта.
+
+    Спутники - из seed, время симулятора идёт по запросам одометрии (шаг
+    CONTROL_PERIOD), а не по настенным часам, поэтому сценарий не зависит от
+    загрузки машины. Цикл останавливается у цели или через max_ticks тактов.
+    Возвращает PROFILER.summary(): p50/p95/p99 HTTP-запросов, расчёта,
+    паузы и всего такта.
+    """
+    import main
+    from robot_client import RobotClient
+    from simulator import RobotinoWorld, Satellites, SimulatorServer
+
+    rng = np.random.default_rng(seed)
+    world = RobotinoWorld(Satellites.random((main.POINT_X, main.POINT_Y), rng))
+    server = SimulatorServer(world, step=main.CONTROL_PERIOD).start()
+    main.robot = RobotClient('127.0.0.1', server.port)
+    main.LOG_LEVEL = 'off'
+    main.TELEMETRY_DIR = None
+    main.PROFILE = True
+    PROFILER.reset()
+    try:
+        main.main_control_loop(max_ticks=max_ticks)
+    finally:
+        server.stop()
+        PROFILER.enabled = False
+    return PROFILER.summary()
+
+
+def collect(loop=True, max_ticks=LOOP_TICKS):
+    """Все замеры в одном словаре "имя -> секунды" (меньше - лучше)."""
+    telemetry.set_log_level('off')  # печать каждого вызова не должна попадать в замер
+    metrics = {}
+    for name, goal, obstacle in bench_backends():
+        metrics[f'{name}.goal'] = goal
+        metrics[f'{name}.obstacle'] = obstacle
+    batch_rate, single_rate = bench_batch()
+    metrics['batch.per_state'] = 1.0 / batch_rate
+    metrics['single.per_state'] = 1.0 / single_rate
+    for count, _, full, sparse in bench_rule_scaling():
+        metrics[f'rules{count}.sparse'] = sparse
+    metrics['sensor_filter.per_sample'] = bench_sensor_filter()
+    if loop:
+        for stage, stats in bench_control_loop(max_ticks=max_ticks).items():
+            for q in ('p50', 'p95', 'p99'):
+                metrics[f'loop.{stage}.{q}'] = stats[q]
+    return metrics
+
+
+def compare(metrics, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Список регрессий: (имя, эталон, сейчас) для замедлившихся больше чем на tolerance."""
+    regressions = []
+    for name, value in metrics.items():
+        base = baseline.get(name)
+        if base is None or not base > 0:
+            continue
+        if value > base * (1 + tolerance):
+            regressions.append((name, base, value))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замеры производительности")
+    parser.add_argument('--save', default=None, help="сохранить замеры в JSON как эталон")
+    parser.add_argument('--compare', default=None, help="сравнить с эталоном из JSON")
+    parser.add_argument('--no-loop', action='store_true', help="без прогона цикла через симулятор")
+    parser.add_argument('--max-ticks', type=int, default=LOOP_TICKS, help="лимит тактов цикла")
+    args = parser.parse_args()
+
+    metrics = collect(loop=not args.no_loop, max_ticks=args.max_ticks)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=1, sort_keys=True)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(metrics, json.load(f))
+        for name, base, value in regressions:
+            print(f"Регрессия {name}: {base * 1e3:.3f} мс -> {value * 1e3:.3f} мс "
+                  f"(x{value / base:.2f})")
+        if regressions:
+            sys.exit(1)
+        print("Регрессий нет")
@@ -0,0 +1,200 @@
+"""Формирование уставок omnidrive перед отправкой.
+
+Контроллер выдаёт новую скорость на каждом такте, и без этого блока каждая
+уставка уходит POST-запросом, даже если она не изменилась, а скачки
+скорости передаются колёсам как есть. CommandShaper между контроллером и
+отправкой:
+  - ограничивает ускорение и рывок по каждой оси (плавный разгон и
+    торможение, меньше проскальзывания колёс);
+  - не отправляет уставку, отличающуюся от уже отправленной меньше DEADBAND;
+  - повторяет последнюю уставку раз в KEEPALIVE секунд, чтобы робот не
+    остановился по таймауту команд (у Robotino и симулятора - 0.5 с).
+Остановка (stop) отправляется сразу, без ограничений.
+
+Отсев неизменных уставок и повтор по таймеру работают всегда
+(CommandShaper.changes_only): столкновений в симуляторе они не добавляют.
+Ограничение ускорения и рывка замедляет реакцию на препятствия и
+включается отдельно (COMMAND_SHAPING в main).
+
+Сравнение с отправкой на каждом такте в симуляторе:
+    python command_shaper.py --episodes 50
+"""
+import argparse
+import math
+
+import numpy as np
+
+
+class CommandShaper:
+    """Ограничение ускорения и рывка уставок и отправка только изменений.
+
+    send - функция отправки (vx, vy, omega). Параметр, равный None,
+    отключает соответствующее ограничение; CommandShaper.changes_only(send) -
+    только отсев неизменных уставок и повтор, CommandShaper.passthrough(send)
+    отправляет каждую уставку без изменений (поведение без формирования).
+    """
+
+    MAX_ACCEL = 1.0  # Ускорение по осям X/Y (м/с^2): 0 -> 0.1 м/с примерно за 0.15 с
+    MAX_JERK = 20.0  # Рывок по осям X/Y (м/с^3)
+    MAX_ANGULAR_ACCEL = 4.0  # Угловое ускорение (рад/с^2)
+    MAX_ANGULAR_JERK = 80.0  # Угловой рывок (рад/с^3)
+    DEADBAND = 0.005  # Изменение уставки меньше этого (м/с, рад/с) не отправляется
+    KEEPALIVE = 0.25  # Повтор неизменной уставки (с): вдвое меньше таймаута команд робота
+
+    def __init__(self, send, max_accel=MAX_ACCEL, max_jerk=MAX_JERK,
+                 max_angular_accel=MAX_ANGULAR_ACCEL, max_angular_jerk=MAX_ANGULAR_JERK,
+                 deadband=DEADBAND, keepalive=KEEPALIVE):
+        self.send = send
+        self.accel_limit = (max_accel, max_accel, max_angular_accel)
+        self.jerk_limit = (max_jerk, max_jerk, max_angular_jerk)
+        self.deadband = deadband
+        self.keepalive = keepalive
+        self.velocity = [0.0, 0.0, 0.0]  # Сформированная уставка
+        self.accel = [0.0, 0.0, 0.0]  # Её текущее ускорение
+        self.sent = (0.0, 0.0, 0.0)  # Последняя отправленная - её и выполняет робот
+        self.last_call = None
+        self.last_send = -math.inf
+        self.calls = 0  # Тактов (уставок от контроллера)
+        self.sends = 0  # Отправленных уставок
+        self.keepalives = 0  # Из них повторов по таймеру
+        self.suppressed = 0  # Уставок, не отправленных как неизменные
+        self.elapsed = 0.0  # Время между первым и последним тактом (с)
+        self.peak_accel = 0.0  # Наибольшее ускорение уставки робота между тактами (м/с^2)
+        self.peak_jerk = 0.0  # Наибольший рывок (м/с^3)
+        self._last_accel = 0.0
+
+    @classmethod
+    def changes_only(cls, send):
+        """Без ограничения ускорения и рывка: отсев неизменных уставок и повтор по таймеру."""
+        return cls(send, None, None, None, None)
+
+    @classmethod
+    def passthrough(cls, send):
+        """Без формирования: каждая уставка отправляется как есть."""
+        return cls(send, None, None, None, None, None, None)
+
+    def _shape(self, axis, target, dt):
+        """Шаг скорости оси к target с ограничением ускорения и рывка."""
+        accel_limit, jerk_limit = self.accel_limit[axis], self.jerk_limit[axis]
+        if accel_limit is None:
+            self.velocity[axis] = target
+            return target
+        if dt <= 0.0:  # Первый такт после старта или остановки - разгон с него
+            return self.velocity[axis]
+        velocity, accel = self.velocity[axis], self.accel[axis]
+        error = target - velocity
+        # Ускорение, с которого рывком jerk_limit можно выйти на target без перелёта
+        wanted = min(accel_limit, math.sqrt(2.0 * jerk_limit * abs(error))) if jerk_limit else accel_limit
+        wanted = math.copysign(wanted, error)
+        if jerk_limit is None:
+            accel = wanted
+        else:
+            step = jerk_limit * dt
+            accel += max(min(wanted - accel, step), -step)
+        velocity += accel * dt
+        if (target - velocity) * error <= 0.0:  # Дошли или перелетели - ровно на уставку
+            velocity, accel = target, 0.0
+        self.velocity[axis], self.accel[axis] = velocity, accel
+        return velocity
+
+    def __call__(self, t, vx, vy, omega=0.0):
+        """Уставка контроллера на такте t. Возвращает сформированную (vx, vy, omega).
+
+        Отправляется она только при заметном изменении или по таймеру повтора.
+        """
+        dt = 0.0 if self.last_call is None else t - self.last_call
+        command = (self._shape(0, vx, dt), self._shape(1, vy, dt), self._shape(2, omega, dt))
+        previous = self.sent
+        changed = (self.deadband is None
+                   or max(abs(a - b) for a, b in zip(command, self.sent)) > self.deadband
+                   # Остановку доводим до нуля, а не до полосы нечувствительности
+                   or (not any(command) and any(self.sent)))
+        if changed or (self.keepalive is not None and t - self.last_send >= self.keepalive):
+            if not changed:
+                self.keepalives += 1
+            self._send(t, command)
+        else:
+            self.suppressed += 1
+        if dt > 0.0:
+            self.elapsed += dt
+            accel = math.hypot(self.sent[0] - previous[0], self.sent[1] - previous[1]) / dt
+            self.peak_accel = max(self.peak_accel, accel)
+            self.peak_jerk = max(self.peak_jerk, abs(accel - self._last_accel) / dt)
+            self._last_accel = accel
+        self.calls += 1
+        self.last_call = t
+        return command
+
+    def _send(self, t, command):
+        self.send(*command)
+        self.sent = command
+        self.last_send = t
+        self.sends += 1
+
+    def stop(self, t):
+        """Немедленная остановка: нулевая уставка без ограничений и сброс профиля."""
+        self.velocity[:] = [0.0, 0.0, 0.0]
+        self.accel[:] = [0.0, 0.0, 0.0]
+        self._send(t, (0.0, 0.0, 0.0))
+        self.last_call = None
+        self._last_accel = 0.0
+
+    @property
+    def rate(self):
+        """Отправок в секунду за время работы."""
+        return self.sends / self.elapsed if self.elapsed else 0.0
+
+    def report(self):
+        return (f"Уставки omnidrive: тактов {self.calls}, отправлено {self.sends} "
+                f"({self.rate:.1f} в с), из них повторов {self.keepalives}, "
+                f"не отправлено {self.suppressed}")
+
+
+def compare(episodes=50, seed=0, max_time=60.0):
+    """Эпизоды симулятора: каждая уставка, только изменения и с ограничением ускорения."""
+    import contextlib
+    import io
+
+    import main
+    import telemetry
+    from controller_cache import load_controller
+    from simulator import RobotinoWorld, Satellites, run_episode
+
+    telemetry.set_log_level('off')
+    nav = load_controller()
+    target = (main.POINT_X, main.POINT_Y)
+    rows = []
+    modes = (('каждый такт', CommandShaper.passthrough), ('только изменения', CommandShaper.changes_only),
+             ('изменения и ограничение ускорения', CommandShaper))
+    for name, make in modes:
+        rng = np.random.default_rng(seed)
+        results, calls, sends, elapsed, accel, jerk = [], 0, 0, 0.0, [], []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(episodes):
+                world = RobotinoWorld(Satellites.random(target, rng))
+                shaper = make(world.set_command)
+                results.append(run_episode(nav, world, target, max_velocity=main.MAX_VELOCITY,
+                                           max_time=max_time, shaper=shaper))
+                calls += shaper.calls
+                sends += shaper.sends
+                elapsed += shaper.elapsed
+                accel.append(shaper.peak_accel)
+                jerk.append(shaper.peak_jerk)
+        rows.append(sends / elapsed)
+        reached = [r for r in results if r['reached']]
+        print(f"{name}: запросов omnidrive {sends} на {calls} тактов ({sends / elapsed:.1f} в с), "
+              f"успешно {sum(r['success'] for r in results)}/{episodes}, "
+              f"столкновений {sum(r['collisions'] for r in results)}, "
+              f"среднее время {np.mean([r['time'] for r in reached]) if reached else float('nan'):.1f} с, "
+              f"пиковое ускорение {np.median(accel):.2f} м/с^2, рывок {np.median(jerk):.0f} м/с^3 (медиана)")
+    for (name, _), rate in zip(modes[1:], rows[1:]):
+        print(f"{name}: запросов omnidrive меньше в {rows[0] / rate:.1f} раза")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Формирование уставок omnidrive")
+    parser.add_argument('--episodes', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    compare(args.episodes, args.seed)
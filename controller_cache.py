@@ -0,0 +1,144 @@
+"""Дисковый кэш скомпилированного контроллера.
+
+NavigationController на каждом старте импортирует skfuzzy и строит
+переменные, термы и обе системы правил - это около секунды. Здесь движки
+MamdaniEngine (и таблица goal_sim в режиме compiled) сохраняются как набор
+.npy файлов. При следующем запуске они открываются через np.load(mmap_mode='r')
+в NavigationCore без импорта skfuzzy: страницы файлов общие для всех
+процессов, которые читают один и тот же кэш.
+
+Ключ кэша - хэш исходников, из которых строятся правила и термы
+(navigation.py, fuzzy_numpy.py, fuzzy_table.py), параметров params и
+CACHE_VERSION. Любая правка определений даёт новый ключ и пересборку.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from fuzzy_numpy import MamdaniEngine
+from fuzzy_table import GoalLookupTable
+from navigation_core import NavigationCore
+from telemetry import INFO, log
+
+CACHE_VERSION = 1  # Менять при изменении формата файлов кэша
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.controller_cache')
+SOURCES = ('navigation.py', 'navigation_core.py', 'fuzzy_numpy.py', 'fuzzy_table.py')
+
+
+def definition_hash(compiled=False, params=None):
+    """Хэш определений контроллера; skfuzzy для него не импортируется."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({'version': CACHE_VERSION, 'compiled': compiled,
+                              'params': params or {}}, sort_keys=True).encode())
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name in SOURCES:
+        with open(os.path.join(root, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _save(nav, path, compiled, params):
+    """Запись во временный каталог и атомарное переименование.
+
+    Несколько процессов могут собирать один ключ одновременно: каталог
+    появляется целиком у первого, остальные свою копию удаляют. Возвращает
+    True, если кэш на диске готов; OSError (каталог только для чтения и т.п.)
+    не выбрасывается - контроллер просто работает без кэша.
+    """
+    parent = os.path.dirname(path)
+    try:
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+    except OSError as error:
+        log(INFO, f"Кэш контроллера не сохранён: {error}")
+        return False
+    try:
+        arrays = {f'goal_{k}': v for k, v in nav.goal_engine.to_arrays().items()}
+        arrays.update({f'obstacle_{k}': v for k, v in nav.obstacle_engine.to_arrays().items()})
+        if compiled:
+            arrays['table_grid_x'] = nav.goal_table.grid_x
+            arrays['table_grid_y'] = nav.goal_table.grid_y
+            for name, table in nav.goal_table.tables.items():
+                arrays[f'table_{name}'] = table
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, name + '.npy'), np.ascontiguousarray(array))
+
+        meta = {
+            'version': CACHE_VERSION,
+            'compiled': compiled,
+            'params': params or {},
+            'arrays': sorted(arrays),
+            'table_max_error': nav.goal_table.max_error if compiled else None,
+        }
+        # meta.json пишется последним: по нему кэш считается готовым
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.rename(tmp, path)
+    except OSError as error:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            log(INFO, f"Кэш контроллера не сохранён: {error}")
+            return False
+    return True
+
+
+def _load(path):
+    """NavigationCore из каталога кэша или None, если кэш неполный или другой версии."""
+    try:
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != CACHE_VERSION:
+            return None
+        arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+                  for name in meta['arrays']}
+    except (OSError, ValueError, KeyError):
+        return None
+
+    def engine(prefix):
+        return MamdaniEngine.from_arrays(
+            {k[len(prefix):]: v for k, v in arrays.items() if k.startswith(prefix)})
+
+    table = None
+    if meta['compiled']:
+        table = GoalLookupTable.from_arrays(
+            arrays['table_grid_x'], arrays['table_grid_y'],
+            {name: arrays[f'table_{name}'] for name in GoalLookupTable.OUTPUTS},
+            max_error=meta['table_max_error'])
+    return NavigationCore(engine('goal_'), engine('obstacle_'), table, meta['params'])
+
+
+def load_controller(compiled=False, params=None, cache_dir=CACHE_DIR):
+    """Контроллер на движках NumPy: из кэша за миллисекунды или со сборкой и сохранением.
+
+    При попадании возвращается NavigationCore (без skfuzzy), при промахе -
+    только что собранный NavigationController(backend='numpy'), даже если
+    сохранить кэш не удалось (например, каталог только для чтения).
+    """
+    path = os.path.join(cache_dir, definition_hash(compiled, params))
+    nav = _load(path)
+    if nav is not None:
+        return nav
+
+    from navigation import NavigationController
+    nav = NavigationController(compiled=compiled, backend='numpy', params=params)
+    if _save(nav, path, compiled, params):
+        print(f"Кэш контроллера сохранён: {path}")
+    return nav
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    compiled = "--compiled" in sys.argv
+    start = time.perf_counter()
+    load_controller(compiled=compiled)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    load_controller(compiled=compiled)
+    print(f"Первый вызов: {first * 1e3:.1f} мс, повторный: "
+          f"{(time.perf_counter() - start) * 1e3:.2f} мс")
@@ -0,0 +1,65 @@
+import math
+from collections import deque
+
+
+class DeadReckoning:
+    """Оценка положения робота между отсчётами одометрии.
+
+    Каждый отсчёт одометрии (с моментом получения) принимается как точное
+    положение; после него положение досчитывается интегрированием
+    отправленных уставок omnidrive (скорости в системе робота, постоянные
+    между отправками). Так цикл получает положение на каждом такте, даже
+    если одометрия обновляется реже или с задержкой.
+    """
+
+    def __init__(self, horizon):
+        self.horizon = horizon  # Сколько секунд можно досчитывать без нового отсчёта
+        self._pose = None  # (t, x, y, phi) последнего отсчёта
+        self._commands = deque(maxlen=256)  # (t, vx, vy, omega) по времени отправки
+        self.samples = 0       # Принятых отсчётов одометрии
+        self.estimates = 0     # Выданных оценок
+        self.max_gap = 0.0     # Наибольший интервал досчёта, с
+
+    def command(self, t, vx, vy, omega=0.0):
+        """Уставка, отправленная роботу в момент t."""
+        self._commands.append((t, vx, vy, omega))
+
+    def update(self, t, x, y, phi):
+        """Новый отсчёт одометрии, полученный в момент t."""
+        self._pose = (t, x, y, phi)
+        self.samples += 1
+        # Уставки до отсчёта уже учтены в нём; оставляем последнюю - она действует после t
+        while len(self._commands) > 1 and self._commands[1][0] <= t:
+            self._commands.popleft()
+
+    def estimate(self, t):
+        """(x, y, phi) на момент t или None, если отсчётов нет или последний старше horizon."""
+        if self._pose is None:
+            return None
+        t0, x, y, phi = self._pose
+        gap = t - t0
+        if gap > self.horizon:
+            return None
+
+        commands = self._commands
+        for i, (start, vx, vy, omega) in enumerate(commands):
+            end = commands[i + 1][0] if i + 1 < len(commands) else t
+            start = max(start, t0)
+            end = min(end, t)
+            if end <= start:
+                continue
+            dt = end - start
+            # Поворот скорости из системы робота по среднему курсу на участке
+            heading = phi + 0.5 * omega * dt
+            cos, sin = math.cos(heading), math.sin(heading)
+            x += dt * (cos * vx - sin * vy)
+            y += dt * (sin * vx + cos * vy)
+            phi += omega * dt
+
+        self.estimates += 1
+        self.max_gap = max(self.max_gap, gap)
+        return x, y, phi
+
+    def report(self):
+        return (f"Счисление пути: отсчётов одометрии {self.samples}, оценок {self.estimates}, "
+                f"макс. досчёт {self.max_gap * 1e3:.0f} мс")
@@ -0,0 +1,280 @@
+"""Управление несколькими роботами из одного процесса.
+
+У каждого робота свой RobotClient, цель, начало координат, фильтр датчиков
+и отправитель уставок; все они обслуживаются одним циклом asyncio. На
+каждом такте одометрия и датчики всех роботов запрашиваются параллельно,
+а нечёткий вывод считается одним вызовом calculate_velocity_batch на весь
+флот.
+
+Файл флота - JSON-список роботов:
+    [{"ip": "192.168.0.1", "target": [0.5, 0.5]},
+     {"ip": "192.168.0.2", "port": 80, "target": [1.0, 0.0]}]
+
+Запуск: python fleet.py fleet.json      (или python main.py --fleet fleet.json)
+        python fleet.py --bench         # сколько роботов держат 50 Гц на одном ядре
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import main
+from async_control import FixedRateScheduler, VelocitySender
+from command_shaper import CommandShaper
+from controller_cache import load_controller
+from robot_client import LatencyStats, RobotClient
+from sensor_filter import SensorFilter
+import telemetry
+from telemetry import INFO, log
+
+
+class FleetRobot:
+    """Один робот флота: соединение, цель и состояние цикла управления."""
+
+    def __init__(self, name, client, target, tolerance=0.02):
+        self.name = name
+        self.client = client
+        self.target = (float(target[0]), float(target[1]))
+        self.tolerance = tolerance
+        self.base = None  # Одометрия на старте - начало координат цели
+        self.done = False
+        self.sender = VelocitySender(self.set_velocity)
+        self.shaper = (CommandShaper(self.sender.submit) if main.COMMAND_SHAPING
+                       else CommandShaper.changes_only(self.sender.submit))
+        self.read_sensors = self._read_sensors
+        if main.SENSOR_FILTER:
+            self.read_sensors = SensorFilter.default().wrap(self._read_sensors)
+
+    def fetch_odometry(self):
+        try:
+            response = self.client.get("odometry")
+            if response.status_code == 200:
+                odometry = response.json()
+                if len(odometry) == 7:
+                    return odometry
+            log(INFO, f"{self.name}: ошибка одометрии")
+        except Exception as error:
+            log(INFO, f"{self.name}: сбой одометрии: {error}")
+        return None
+
+    def _read_sensors(self):
+        try:
+            response = self.client.get("distancesensorarray")
+            if response.status_code != 200:
+                log(INFO, f"{self.name}: ошибка HTTP {response.status_code}")
+                return None
+            sensor_data = response.json()
+            if len(sensor_data) != 9:
+                log(INFO, f"{self.name}: неверное количество сенсоров")
+                return None
+            return main.group_proximity_sensors(sensor_data)
+        except Exception as error:
+            log(INFO, f"{self.name}: сбой датчиков: {error}")
+            return None
+
+    def set_velocity(self, vx, vy, omega):
+        try:
+            self.client.post("omnidrive", [vx, vy, omega])
+        except Exception as error:
+            log(INFO, f"{self.name}: ошибка отправки: {error}")
+
+
+class Fleet:
+    """Роботы флота и общий контроллер."""
+
+    def __init__(self, robots, nav=None, period=main.CONTROL_PERIOD, max_velocity=main.MAX_VELOCITY):
+        self.robots = robots
+        self.nav = nav or load_controller()  # Движки NumPy: пакетный вывод без skfuzzy
+        self.period = period
+        self.max_velocity = max_velocity
+        self.scheduler = FixedRateScheduler(period)
+        self.compute = LatencyStats()  # Расчёт такта после прихода данных (вывод + уставки)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with open(path, encoding='utf-8') as f:
+            spec = json.load(f)
+        robots = [FleetRobot(item.get('name', item['ip']),
+                             RobotClient(item['ip'], item.get('port', main.CONTROL_PORT)),
+                             item['target'])
+                  for item in spec]
+        return cls(robots, **kwargs)
+
+    async def run(self, duration=None):
+        """Цикл управления всем флотом до прихода всех роботов к целям или duration секунд."""
+        loop = asyncio.get_running_loop()
+        # На каждого робота до трёх одновременных запросов (два GET и POST)
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=3 * len(self.robots)))
+        senders = [asyncio.create_task(robot.sender.run()) for robot in self.robots]
+        nav = self.nav
+        limit = self.max_velocity
+        start = time.perf_counter()
+        try:
+            while not all(robot.done for robot in self.robots):
+                if duration is not None and time.perf_counter() - start > duration:
+                    break
+                await self.scheduler.wait()
+                active = [robot for robot in self.robots if not robot.done]
+                # Запросы всех роботов одновременно: такт ждёт самый медленный ответ
+                replies = await asyncio.gather(
+                    *(asyncio.to_thread(robot.fetch_odometry) for robot in active),
+                    *(asyncio.to_thread(robot.read_sensors) for robot in active))
+                begin = time.perf_counter()
+                now = time.monotonic()
+                ready, dx, dy, sensors = [], [], [], []
+                for robot, odom, values in zip(active, replies[:len(active)], replies[len(active):]):
+                    if not odom or not values:
+                        continue
+                    if robot.base is None:
+                        robot.base = (odom[0], odom[1])
+                    delta_x = robot.target[0] - (odom[0] - robot.base[0])
+                    delta_y = robot.target[1] - (odom[1] - robot.base[1])
+                    if math.hypot(delta_x, delta_y) <= robot.tolerance:
+                        robot.done = True
+                        robot.shaper.stop(now)
+                        print(f"{robot.name}: задача выполнена")
+                        continue
+                    ready.append(robot)
+                    dx.append(delta_x)
+                    dy.append(delta_y)
+                    sensors.append(values)
+                if ready:
+                    # Один пакетный вывод на всех роботов такта
+                    vx, vy = nav.calculate_velocity_batch(dx, dy, sensors)
+                    np.clip(vx, -limit, limit, out=vx)
+                    np.clip(vy, -limit, limit, out=vy)
+                    for robot, x, y in zip(ready, vx.tolist(), vy.tolist()):
+                        robot.shaper(now, x, y, 0)
+                self.compute.add(time.perf_counter() - begin)
+        finally:
+            for task in senders:
+                task.cancel()
+            for robot in self.robots:
+                await robot.sender.drain()
+                await asyncio.to_thread(robot.set_velocity, 0, 0, 0)
+
+    def report(self):
+        lines = [self.scheduler.report(),
+                 f"Расчёт такта: среднее {self.compute.mean * 1e3:.3f} мс, "
+                 f"макс {self.compute.max * 1e3:.3f} мс"]
+        for robot in self.robots:
+            lines.append(f"{robot.name}: {'у цели' if robot.done else 'в пути'}, "
+                         f"заменено уставок {robot.sender.skipped}")
+            lines.append(f"  {robot.shaper.report()}")
+            lines += [f"  {line}" for line in robot.client.report()]
+        return lines
+
+    def close(self):
+        for robot in self.robots:
+            robot.client.close()
+
+
+def run(path):
+    telemetry.set_log_level('info')
+    fleet = Fleet.load(path)
+    try:
+        asyncio.run(fleet.run())
+    except KeyboardInterrupt:
+        print("Прервано пользователем.")
+    finally:
+        for line in fleet.report():
+            print(line)
+        fleet.close()
+
+
+def _serve_worlds(count, seed, conn):
+    """Процесс-симулятор: count миров со своими HTTP-серверами до сигнала остановки."""
+    from simulator import RobotinoWorld, Satellites, SimulatorServer
+
+    rng = np.random.default_rng(seed)
+    servers = [SimulatorServer(RobotinoWorld(Satellites.random((main.POINT_X, main.POINT_Y), rng))).start()
+               for _ in range(count)]
+    conn.send([server.port for server in servers])
+    conn.recv()
+    for server in servers:
+        server.stop()
+
+
+def bench_batch_inference(nav, count, repeat=50, seed=0):
+    """Вывод для count роботов: один пакетный вызов против count одиночных, с."""
+    rng = np.random.default_rng(seed)
+    dx, dy = rng.uniform(-0.6, 0.6, (2, count))
+    sensors = rng.uniform(0.0, nav.SENSOR_LIMIT, (count, 7))
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        nav.calculate_velocity_batch(dx, dy, sensors)
+    batch = (time.perf_counter() - begin) / repeat
+    rows = list(zip(dx.tolist(), dy.tolist(), sensors.tolist()))
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        for x, y, values in rows:
+            nav.calculate_velocity(x, y, *values)
+    single = (time.perf_counter() - begin) / repeat
+    return batch, single
+
+
+def bench_fleet(counts=(1, 2, 4, 8, 16), duration=5.0, period=main.CONTROL_PERIOD, seed=0):
+    """Сколько роботов флот ведёт с периодом period на одном ядре.
+
+    Симуляторы работают в отдельном процессе; цели вне досягаемости, чтобы
+    все роботы ехали весь замер. Доля ядра - процессорное время процесса
+    флота (все его потоки) к настенному. Если симулятор делит с флотом одно
+    ядро, пропуски тактов завышены, а оценка по доле ядра остаётся честной.
+    """
+    telemetry.set_log_level('off')
+    nav = load_controller()
+    rows = []
+    for count in counts:
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_serve_worlds, args=(count, seed, child), daemon=True)
+        process.start()
+        ports = parent.recv()
+        robots = [FleetRobot(f"robot{i}", RobotClient('127.0.0.1', port), (5.0, 5.0))
+                  for i, port in enumerate(ports)]
+        fleet = Fleet(robots, nav, period)
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        asyncio.run(fleet.run(duration))
+        share = (time.process_time() - cpu) / (time.perf_counter() - wall)
+        fleet.close()
+        parent.send('stop')
+        process.join()
+        ticks = fleet.scheduler.drift.count
+        batch, single = bench_batch_inference(nav, count)
+        rows.append((count, ticks / duration, fleet.scheduler.missed, fleet.scheduler.drift.max,
+                     share, batch, single))
+
+    print(f"{'роботов':>8}{'тактов/с':>10}{'пропущено':>11}{'макс. дрейф, мс':>17}"
+          f"{'доля ядра':>11}{'вывод пакетом, мс':>19}{'по одному, мс':>15}")
+    for count, rate, missed, drift, share, batch, single in rows:
+        print(f"{count:>8}{rate:>10.1f}{missed:>11}{drift * 1e3:>17.1f}{share:>11.0%}"
+              f"{batch * 1e3:>19.3f}{single * 1e3:>15.3f}")
+    # Процессорное время на робота за такт - по самому большому флоту, где накладные
+    # расходы цикла лучше всего распределены
+    count, rate, _, _, share, *_ = rows[-1]
+    per_robot_tick = share / (rate * count)
+    print(f"Процессорное время на робота за такт: {per_robot_tick * 1e3:.2f} мс; "
+          f"оценка: до {int(period / per_robot_tick)} роботов на ядро при {1 / period:.0f} Гц")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Флот роботов в одном цикле asyncio")
+    parser.add_argument('fleet', nargs='?', help="JSON-список роботов")
+    parser.add_argument('--bench', action='store_true', help="замер против симуляторов")
+    parser.add_argument('--counts', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.bench:
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})  # Флот - на одном ядре
+        bench_fleet(args.counts, args.duration)
+    else:
+        run(args.fleet)
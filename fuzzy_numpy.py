@@ -0,0 +1,307 @@
+import json
+
+import numpy as np
+
+
+class MamdaniEngine:
+    """Векторизованный вывод Мамдани на чистом NumPy.
+
+    Компилируется из правил skfuzzy (ctrl.Rule) и повторяет
+    ControlSystemSimulation: фаззификация np.interp по универсуму,
+    AND = fmin, OR = fmax, NOT = 1 - x, импликация срезом (min),
+    аккумуляция fmax и дефаззификация центроидом по кусочно-линейной
+    функции с добавленными точками среза (как в skfuzzy.find_memberships).
+
+    Входы подаются массивом в порядке input_labels, выходы возвращаются
+    в порядке output_labels - без словарей sim.input / sim.output.
+    """
+
+    CHUNK = 512  # Размер порции строк в compute_batch
+    SPARSE = True  # Считать только правила, которые могут сработать (active_rules)
+
+    def __init__(self, input_labels, output_labels, input_universes, input_mfs,
+                 term_input, output_universes, output_mfs, rules):
+        self.input_labels = tuple(input_labels)
+        self.output_labels = tuple(output_labels)
+        self.input_universes = input_universes  # список 1D массивов по входам
+        self.input_mfs = input_mfs              # список (термы входа x универсум)
+        self.term_input = term_input            # для каждого входного терма - индекс входа
+        self.output_universes = output_universes
+        self.output_mfs = output_mfs
+        # Правило: (дерево антецедента, [(выход, терм выхода, вес), ...])
+        self.rules = rules
+
+        self._n_terms = len(term_input)
+        self._term_offsets = np.cumsum([0] + [len(m) for m in input_mfs])
+        self._segments = [self._segment_tables(u, m)
+                          for u, m in zip(output_universes, output_mfs)]
+
+        # Индекс правил по термам: required[r, k] = 1, если правило r не может
+        # сработать при нулевой принадлежности терма k
+        self.sparse = self.SPARSE
+        self._required = np.zeros((len(rules), self._n_terms))
+        for r, (node, _) in enumerate(rules):
+            self._required[r, sorted(self._required_terms(node))] = 1.0
+        self._required_count = self._required.sum(axis=1)
+
+    @classmethod
+    def from_rules(cls, rules, inputs, outputs):
+        """Компиляция списка ctrl.Rule в массивы.
+
+        inputs / outputs - метки переменных в нужном порядке.
+        """
+        variables = {}
+        for rule in rules:
+            for term in rule.antecedent_terms:
+                variables[term.parent.label] = term.parent
+            for weighted in rule.consequent:
+                variables[weighted.term.parent.label] = weighted.term.parent
+
+        input_universes, input_mfs, term_input = [], [], []
+        term_index = {}
+        for i, label in enumerate(inputs):
+            var = variables[label]
+            input_universes.append(np.asarray(var.universe, dtype=float))
+            mfs = []
+            for name, term in var.terms.items():
+                term_index[(label, name)] = len(term_input)
+                term_input.append(i)
+                mfs.append(np.asarray(term.mf, dtype=float))
+            input_mfs.append(np.array(mfs))
+
+        output_universes, output_mfs = [], []
+        output_term_index = {}
+        for o, label in enumerate(outputs):
+            var = variables[label]
+            output_universes.append(np.asarray(var.universe, dtype=float))
+            mfs = []
+            for name, term in var.terms.items():
+                output_term_index[(label, name)] = (o, len(mfs))
+                mfs.append(np.asarray(term.mf, dtype=float))
+            output_mfs.append(np.array(mfs))
+
+        def compile_node(node):
+            # Term - лист дерева, TermAggregate - узел and/or/not
+            if hasattr(node, 'kind'):
+                if node.kind == 'not':
+                    return ('not', compile_node(node.term1))
+                return (node.kind, compile_node(node.term1), compile_node(node.term2))
+            return ('term', term_index[(node.parent.label, node.label)])
+
+        compiled = []
+        for rule in rules:
+            if rule.and_func is not np.fmin or rule.or_func is not np.fmax:
+                raise ValueError("Поддерживаются только and_func=fmin и or_func=fmax")
+            consequents = [
+                output_term_index[(w.term.parent.label, w.term.label)] + (float(w.weight),)
+                for w in rule.consequent
+            ]
+            compiled.append((compile_node(rule.antecedent), consequents))
+
+        term_input = np.array(term_input, dtype=int)
+        return cls(inputs, outputs, input_universes, input_mfs, term_input,
+                   output_universes, output_mfs, compiled)
+
+    def to_arrays(self):
+        """Все данные движка в виде словаря массивов (для сохранения на диск)."""
+        arrays = {
+            'labels': np.array([json.dumps({
+                'inputs': self.input_labels,
+                'outputs': self.output_labels,
+                'rules': self.rules,
+            })]),
+            'term_input': self.term_input,
+        }
+        for i, (universe, mfs) in enumerate(zip(self.input_universes, self.input_mfs)):
+            arrays[f'input{i}_universe'] = universe
+            arrays[f'input{i}_mfs'] = mfs
+        for o, (universe, mfs) in enumerate(zip(self.output_universes, self.output_mfs)):
+            arrays[f'output{o}_universe'] = universe
+            arrays[f'output{o}_mfs'] = mfs
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Восстановление движка из словаря to_arrays (массивы могут быть memmap)."""
+        meta = json.loads(str(arrays['labels'][0]))
+
+        def tree(node):
+            # JSON превращает кортежи в списки - возвращаем кортежи узлов
+            if node[0] == 'term':
+                return ('term', node[1])
+            return (node[0],) + tuple(tree(child) for child in node[1:])
+
+        rules = [(tree(node), [tuple(c) for c in consequents])
+                 for node, consequents in meta['rules']]
+        inputs, outputs = meta['inputs'], meta['outputs']
+        return cls(inputs, outputs,
+                   [arrays[f'input{i}_universe'] for i in range(len(inputs))],
+                   [arrays[f'input{i}_mfs'] for i in range(len(inputs))],
+                   arrays['term_input'],
+                   [arrays[f'output{o}_universe'] for o in range(len(outputs))],
+                   [arrays[f'output{o}_mfs'] for o in range(len(outputs))],
+                   rules)
+
+    @staticmethod
+    def _segment_tables(universe, mfs):
+        """Для каждого отрезка универсума - термы, ненулевые на нём.
+
+        На отрезке [u_i, u_i+1] выходная функция зависит только от этих
+        термов, поэтому центроид считается без перебора всех термов.
+        Недостающие места заполняются нулевым фиктивным термом.
+        """
+        nonzero = (mfs[:, :-1] > 0) | (mfs[:, 1:] > 0)  # (термы, отрезки)
+        width = max(int(nonzero.sum(axis=0).max()), 1)
+        dummy = len(mfs)
+        seg_terms = np.full((len(universe) - 1, width), dummy)
+        for i in range(len(universe) - 1):
+            active = np.flatnonzero(nonzero[:, i])
+            seg_terms[i, :len(active)] = active
+        padded = np.vstack([mfs, np.zeros(len(universe))])
+        seg = np.arange(len(universe) - 1)[:, np.newaxis]
+        return seg_terms, padded[seg_terms, seg], padded[seg_terms, seg + 1]
+
+    def fuzzify(self, x):
+        """Степени принадлежности всех входных термов: (N, число термов)."""
+        mu = np.empty((x.shape[0], self._n_terms))
+        for i, (universe, mfs) in enumerate(zip(self.input_universes, self.input_mfs)):
+            # np.interp удерживает крайние значения - то же, что clip_to_bounds
+            value = x[:, i]
+            start = self._term_offsets[i]
+            for k, mf in enumerate(mfs):
+                mu[:, start + k] = np.interp(value, universe, mf)
+        return mu
+
+    @classmethod
+    def _required_terms(cls, node):
+        """Термы, без которых узел дерева равен нулю.
+
+        AND = fmin обнуляется любым нулевым аргументом, OR = fmax - только
+        если обнулены оба, NOT = 1 - x при x = 0 равен единице.
+        """
+        kind = node[0]
+        if kind == 'term':
+            return {node[1]}
+        if kind == 'not':
+            return set()
+        left = cls._required_terms(node[1])
+        right = cls._required_terms(node[2])
+        return left | right if kind == 'and' else left & right
+
+    def active_rules(self, mu):
+        """Индексы правил, у которых все обязательные термы ненулевые хотя бы в одной строке.
+
+        Остальные правила дают нулевую степень срабатывания и не меняют
+        срезы (fmax с нулём), поэтому их пропуск не меняет результат.
+        """
+        if not self.sparse:
+            return np.arange(len(self.rules))
+        present = (mu > 0).astype(float) @ self._required.T  # (N, правила)
+        return np.flatnonzero((present >= self._required_count).any(axis=0))
+
+    def _evaluate(self, node, mu):
+        kind = node[0]
+        if kind == 'term':
+            return mu[:, node[1]]
+        if kind == 'not':
+            return 1.0 - self._evaluate(node[1], mu)
+        left = self._evaluate(node[1], mu)
+        right = self._evaluate(node[2], mu)
+        return np.fmin(left, right) if kind == 'and' else np.fmax(left, right)
+
+    def firing_strengths(self, mu, rules=None):
+        """Степени срабатывания правил rules (по умолчанию всех): (N, len(rules))."""
+        if rules is None:
+            rules = range(len(self.rules))
+        firing = np.zeros((mu.shape[0], len(rules)))
+        for i, r in enumerate(rules):
+            firing[:, i] = self._evaluate(self.rules[r][0], mu)
+        return firing
+
+    def _accumulate(self, firing, rules):
+        """Уровни среза термов каждого выхода (аккумуляция fmax)."""
+        n = firing.shape[0]
+        cuts = [np.zeros((n, len(mfs))) for mfs in self.output_mfs]
+        for i, r in enumerate(rules):
+            for out, term, weight in self.rules[r][1]:
+                np.fmax(cuts[out][:, term], firing[:, i] * weight, out=cuts[out][:, term])
+        return cuts
+
+    def _centroid(self, o, cut):
+        """Центроид объединения срезанных термов для выхода o; NaN при пустом множестве."""
+        universe, mfs = self.output_universes[o], self.output_mfs[o]
+        seg_terms, y1, y2 = self._segments[o]  # (отрезки, A)
+        x1 = universe[:-1, np.newaxis]
+        h = np.diff(universe)[:, np.newaxis]
+        n = cut.shape[0]
+
+        # Уровни среза активных термов каждого отрезка: (N, отрезки, A)
+        level = np.concatenate([cut, np.zeros((n, 1))], axis=1)[:, seg_terms]
+
+        # Точки пересечения уровня среза с термами внутри отрезка (как в skfuzzy).
+        # Где пересечения нет, ставим левый узел - отрезок нулевой ширины.
+        crossing = (y1 >= level) != (y2 >= level)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x1 + (level - y1) * h / (y2 - y1)
+        x_cross = np.sort(np.where(crossing, x_cross, x1), axis=-1)
+
+        # Узлы отрезка: левый конец универсума + точки пересечения (N, отрезки, A + 1)
+        nodes = np.concatenate([np.broadcast_to(x1, (n,) + x1.shape), x_cross], axis=-1)
+        w = (nodes - x1) / h
+        term_mf = (y1[..., np.newaxis] + (y2 - y1)[..., np.newaxis] * w[:, :, np.newaxis, :])
+        mf = np.minimum(level[..., np.newaxis], term_mf).max(axis=2)
+
+        # Правый конец универсума
+        last_mf = np.minimum(cut, mfs[:, -1]).max(axis=1)
+        nodes = np.concatenate([nodes.reshape(n, -1), np.full((n, 1), universe[-1])], axis=1)
+        mf = np.concatenate([mf.reshape(n, -1), last_mf[:, np.newaxis]], axis=1)
+
+        # Точный центроид кусочно-линейной функции (формулы skfuzzy.centroid)
+        xa, dx = nodes[:, :-1], np.diff(nodes, axis=1)
+        ya, yb = mf[:, :-1], mf[:, 1:]
+        area = 0.5 * dx * (ya + yb)
+        moment = dx * dx / 3.0 * (yb + 0.5 * ya) + xa * area
+        result = moment.sum(axis=1) / np.fmax(area.sum(axis=1), np.finfo(float).eps)
+        result[mf.sum(axis=1) == 0] = np.nan
+        return result
+
+    def compute_batch(self, x):
+        """Вывод для массива состояний x формы (N, число входов) -> (N, число выходов)."""
+        x = np.asarray(x, dtype=float)
+        if len(x) > self.CHUNK:
+            # Промежуточные массивы (термы x N x узлы) держим в пределах кэша
+            return np.vstack([self._compute_chunk(x[i:i + self.CHUNK])
+                              for i in range(0, len(x), self.CHUNK)])
+        return self._compute_chunk(x)
+
+    def _compute_chunk(self, x):
+        mu = self.fuzzify(x)
+        rules = self.active_rules(mu)
+        cuts = self._accumulate(self.firing_strengths(mu, rules), rules)
+        return np.column_stack([self._centroid(o, cut) for o, cut in enumerate(cuts)])
+
+    def compute(self, *values):
+        """Вывод для одного состояния; NaN на выходе - аналог исключения skfuzzy."""
+        return tuple(self.compute_batch(np.array([values], dtype=float))[0])
+
+    def max_deviation(self, sim, samples):
+        """Максимальное отклонение от ControlSystemSimulation на наборе входов (N, число входов)."""
+        samples = np.asarray(samples, dtype=float)
+        ours = self.compute_batch(samples)
+        worst = 0.0
+        for row, expected_row in zip(samples, ours):
+            for label, value in zip(self.input_labels, row):
+                sim.input[label] = value
+            try:
+                sim.compute()
+                # В режиме lenient skfuzzy просто не кладёт неопределённый выход в output
+                reference = np.array([sim.output.get(label, np.nan)
+                                      for label in self.output_labels], dtype=float)
+            except Exception:
+                reference = np.full(len(self.output_labels), np.nan)
+            # Совпадение "не посчитано" в обоих вариантах - не ошибка
+            if np.any(np.isnan(reference) != np.isnan(expected_row)):
+                return np.inf
+            diff = np.abs(np.nan_to_num(reference) - np.nan_to_num(expected_row))
+            worst = max(worst, float(diff.max()))
+        return worst
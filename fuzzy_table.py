@@ -0,0 +1,191 @@
+import numpy as np
+
+
+class GoalLookupTable:
+    """Предвычисленная таблица выходов нечёткой системы движения к цели.
+
+    Система skfuzzy опрашивается один раз на сетке (dx, dy) при создании,
+    после чего скорости получаются билинейной интерполяцией по таблице.
+    Узлы, где skfuzzy не смог дефаззифицировать (край универсума -2.0),
+    заполняются значением ближайшего рассчитанного узла: иначе NaN
+    растекался бы интерполяцией на всю соседнюю ячейку.
+    """
+
+    OUTPUTS = ('velocity_x', 'velocity_y')
+
+    def __init__(self, sim, grid_x, grid_y, inputs=('position_x', 'position_y')):
+        self.sim = sim
+        self.inputs = inputs
+        self.grid_x = np.asarray(grid_x, dtype=float)
+        self.grid_y = np.asarray(grid_y, dtype=float)
+        self.tables = {
+            name: np.full((len(self.grid_x), len(self.grid_y)), np.nan)
+            for name in self.OUTPUTS
+        }
+        self.max_error = None  # Заполняется методом verify()
+        self._sample()
+        self._fill_missing()
+
+    @classmethod
+    def from_arrays(cls, grid_x, grid_y, tables, max_error=None,
+                    inputs=('position_x', 'position_y')):
+        """Таблица из готовых массивов, без опроса skfuzzy (verify недоступен)."""
+        table = cls.__new__(cls)
+        table.sim = None
+        table.inputs = inputs
+        table.grid_x = grid_x
+        table.grid_y = grid_y
+        table.tables = dict(tables)
+        table.max_error = max_error
+        return table
+
+    @staticmethod
+    def default_grid(universe):
+        """Неравномерная сетка: плотно в зоне переходов термов, редко на плато."""
+        low, high = float(universe.min()), float(universe.max())
+        return np.unique(np.round(np.concatenate([
+            np.arange(-0.15, 0.1501, 0.005),   # near_*/center - основная нелинейность
+            [-1.0, -0.5, -0.2, 0.2, 0.5, 1.0],  # плато far_*
+            np.arange(low, -1.55, 0.05),        # спад far_back/far_right у края
+            np.arange(1.6, high, 0.05),         # спад far_front/far_left у края
+            [low, low + 0.01, high - 0.01, high],
+        ]), 6))
+
+    def _dependencies(self):
+        """Для каждого выхода - множество входов, от которых он зависит."""
+        deps = {name: set() for name in self.OUTPUTS}
+        for rule in self.sim.ctrl.rules:
+            sources = {term.parent.label for term in rule.antecedent_terms}
+            for weighted in rule.consequent:
+                deps[weighted.term.parent.label] |= sources
+        return deps
+
+    def _evaluate(self, dx, dy):
+        """Живой расчёт skfuzzy; NaN, если система не смогла дефаззифицировать."""
+        self.sim.input[self.inputs[0]] = dx
+        self.sim.input[self.inputs[1]] = dy
+        try:
+            self.sim.compute()
+            return tuple(self.sim.output[name] for name in self.OUTPUTS)
+        except Exception:
+            return (np.nan,) * len(self.OUTPUTS)
+
+    def _sample(self):
+        """Заполнение таблицы значениями skfuzzy в узлах сетки."""
+        deps = self._dependencies()
+        separable = all(len(d & set(self.inputs)) <= 1 for d in deps.values())
+
+        if not separable:
+            # Общий случай: полный перебор узлов сетки
+            for i, dx in enumerate(self.grid_x):
+                for j, dy in enumerate(self.grid_y):
+                    for name, value in zip(self.OUTPUTS, self._evaluate(dx, dy)):
+                        self.tables[name][i, j] = value
+            return
+
+        # Каждый выход зависит не более чем от одной координаты (как в goal_rules),
+        # поэтому достаточно пройти сетку "по диагонали" и размножить значения
+        n = max(len(self.grid_x), len(self.grid_y))
+        line = np.full((n, len(self.OUTPUTS)), np.nan)
+        for k in range(n):
+            dx = self.grid_x[min(k, len(self.grid_x) - 1)]
+            dy = self.grid_y[min(k, len(self.grid_y) - 1)]
+            line[k] = self._evaluate(dx, dy)
+
+        for col, name in enumerate(self.OUTPUTS):
+            if self.inputs[1] in deps[name]:
+                self.tables[name][:] = line[:len(self.grid_y), col][np.newaxis, :]
+            else:
+                self.tables[name][:] = line[:len(self.grid_x), col][:, np.newaxis]
+
+    def _fill_missing(self):
+        """NaN-узлы таблиц - значение ближайшего (по dx, dy) рассчитанного узла."""
+        gx, gy = np.meshgrid(self.grid_x, self.grid_y, indexing='ij')
+        for table in self.tables.values():
+            missing = np.isnan(table)
+            if not missing.any() or missing.all():
+                continue
+            vx, vy, values = gx[~missing], gy[~missing], table[~missing]
+            for i, j in np.argwhere(missing):
+                nearest = np.argmin((vx - gx[i, j]) ** 2 + (vy - gy[i, j]) ** 2)
+                table[i, j] = values[nearest]
+
+    def lookup(self, dx, dy):
+        """Билинейная интерполяция выходов в точке (dx, dy)."""
+        gx, gy = self.grid_x, self.grid_y
+        # Как и skfuzzy (clip_to_bounds), прижимаем входы к границам универсума
+        dx = min(max(dx, gx[0]), gx[-1])
+        dy = min(max(dy, gy[0]), gy[-1])
+
+        i = min(max(np.searchsorted(gx, dx) - 1, 0), len(gx) - 2)
+        j = min(max(np.searchsorted(gy, dy) - 1, 0), len(gy) - 2)
+        tx = (dx - gx[i]) / (gx[i + 1] - gx[i])
+        ty = (dy - gy[j]) / (gy[j + 1] - gy[j])
+
+        result = []
+        for name in self.OUTPUTS:
+            t = self.tables[name]
+            result.append(
+                (1 - tx) * (1 - ty) * t[i, j] + tx * (1 - ty) * t[i + 1, j]
+                + (1 - tx) * ty * t[i, j + 1] + tx * ty * t[i + 1, j + 1]
+            )
+        return tuple(result)
+
+    def lookup_batch(self, dx, dy):
+        """Векторная версия lookup для массивов dx, dy."""
+        gx, gy = self.grid_x, self.grid_y
+        dx = np.clip(dx, gx[0], gx[-1])
+        dy = np.clip(dy, gy[0], gy[-1])
+
+        i = np.clip(np.searchsorted(gx, dx) - 1, 0, len(gx) - 2)
+        j = np.clip(np.searchsorted(gy, dy) - 1, 0, len(gy) - 2)
+        tx = (dx - gx[i]) / (gx[i + 1] - gx[i])
+        ty = (dy - gy[j]) / (gy[j + 1] - gy[j])
+
+        result = []
+        for name in self.OUTPUTS:
+            t = self.tables[name]
+            result.append(
+                (1 - tx) * (1 - ty) * t[i, j] + tx * (1 - ty) * t[i + 1, j]
+                + (1 - tx) * ty * t[i, j + 1] + tx * ty * t[i + 1, j + 1]
+            )
+        return tuple(result)
+
+    def verify(self, samples=200, seed=0):
+        """Сравнение таблицы с живым skfuzzy в случайных точках.
+
+        Половина точек берётся из всей области сетки, половина - из зоны
+        |d| < 0.2, где функции принадлежности меняются быстрее всего; к ним
+        добавляются полосы у краёв универсума по каждой оси. Точки, где
+        skfuzzy сам не считает (ровно на краю), пропускаются: таблица там
+        отдаёт значение соседнего узла.
+        Возвращает максимальную абсолютную ошибку по скоростям (м/с).
+        """
+        rng = np.random.default_rng(seed)
+        wide = samples // 2
+        edge = []
+        for low, high in ((self.grid_x[0], self.grid_x[-1]), (self.grid_y[0], self.grid_y[-1])):
+            edge.append(np.concatenate([np.linspace(low, low + 0.02, 9), np.linspace(high - 0.02, high, 9)]))
+        middle = rng.uniform(-0.5, 0.5, len(edge[0]))
+        points = np.vstack([
+            np.column_stack([
+                rng.uniform(self.grid_x[0], self.grid_x[-1], wide),
+                rng.uniform(self.grid_y[0], self.grid_y[-1], wide),
+            ]),
+            rng.uniform(-0.2, 0.2, (samples - wide, 2)),
+            np.column_stack([edge[0], middle]),
+            np.column_stack([middle, edge[1]]),
+        ])
+
+        max_error = 0.0
+        for dx, dy in points:
+            expected = np.array(self._evaluate(dx, dy))
+            if np.isnan(expected).all():
+                continue
+            actual = np.array(self.lookup(dx, dy))
+            # NaN = "система не посчитала" (робот стоит), т.е. скорость 0
+            diff = np.abs(np.nan_to_num(expected) - np.nan_to_num(actual))
+            max_error = max(max_error, float(diff.max()))
+
+        self.max_error = max_error
+        return max_error
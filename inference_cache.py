@@ -0,0 +1,50 @@
+from collections import OrderedDict
+
+
+class InferenceCache:
+    """LRU-кэш нечёткого вывода по квантованным входам.
+
+    Входы округляются до сетки с шагом quanta (отдельный шаг для каждого
+    входа), и вывод всегда считается в узле сетки. Поэтому результат
+    зависит только от ячейки, а не от того, какое значение из неё пришло
+    первым, и повторный такт с входами в той же ячейке берётся из кэша.
+    """
+
+    def __init__(self, compute, quanta, maxsize=4096):
+        self.compute = compute
+        self.quanta = tuple(quanta)
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __call__(self, *values):
+        key = tuple(round(v / q) for v, q in zip(values, self.quanta))
+        entries = self._entries
+        result = entries.get(key)
+        if result is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = self.compute(*(k * q for k, q in zip(key, self.quanta)))
+        entries[key] = result
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        self._entries.clear()
+
+    def __str__(self):
+        return (f"попаданий {self.hits}, промахов {self.misses} "
+                f"({self.hit_rate:.1%}), вытеснено {self.evictions}, "
+                f"записей {len(self._entries)}/{self.maxsize}")
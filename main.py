@@ -1,10 +1,19 @@
-import requests
-import socket
 import math
+import os
 import time
 import sys
 
-from navigation import NavigationController
+from controller_cache import load_controller
+from robot_client import RobotClient
+from acquisition import AcquisitionThread, CommandSender
+from dead_reckoning import DeadReckoning
+from sensor_filter import SensorFilter
+from mission import Mission
+from obstacle_prediction import ObstacleTracker
+from command_shaper import CommandShaper
+from profiler import PROFILER
+import telemetry
+from telemetry import DEBUG, INFO, TelemetryRecorder, log
 
 #=====Глобальные настройки=====
 ROBOT_IP = '192.168.0.1'
@@ -16,56 +25,73 @@ POINT_Y = 0.5
 #MAX_VELOCITY = 0.30
 MAX_VELOCITY = 0.1
 MIN_VELOCITY = 0.05
+
+CONTROL_PERIOD = 0.02 #Период такта управления (50 Гц)
+STALE_LIMIT = 0.2 #Максимальный возраст данных датчиков (с), старше - остановка
+ODOMETRY_HORIZON = 0.5 #Сколько секунд положение досчитывается по уставкам без новой одометрии
+
+LOG_LEVEL = 'debug' #Печать в цикле: 'debug' - каждый такт, 'info' - ошибки и события, 'off' - ничего
+TELEMETRY_DIR = 'telemetry' #Каталог бинарных записей тактов (None - не записывать)
+PROFILE = False #Замер времени этапов такта, p50/p95/p99 печатаются при завершении
+INFERENCE_CACHE = False #Кэш вывода по квантованным входам (проверить на записи: replay.py --cache)
+SENSOR_FILTER = True #Фильтр датчиков: ограничение SENSOR_LIMIT, отсев одиночных выбросов, медиана по 3 отсчётам
+OBSTACLE_PREDICTION = False #Прогноз движения спутников вокруг цели (POINT_X, POINT_Y) - только для задачи со спутниками; выигрыш в симуляторе в пределах разброса
+COMMAND_SHAPING = False #Ограничение ускорения и рывка уставок (в симуляторе столкновений пока больше); отправка только изменившихся уставок с повтором раз в 0.25 с - всегда
 #=====Глобальные настройки=====
 
+#Общий HTTP-клиент: одно keep-alive соединение на все запросы к роботу
+robot = RobotClient(ROBOT_IP, CONTROL_PORT)
+
 def CONNECT():
-    try:
-        connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM) #Создание сокета TCP
-        connection.connect((ROBOT_IP, CONTROL_PORT)) #Подключение к роботу по HTTP
+    if robot.connect(): #Первый запрос открывает соединение, дальше оно переиспользуется
         print("Соединение установлено.")
-        return connection
-    except Exception as error:
-        print(f"Ошибка подключения: {error}")
-        return None
+        return robot
+    return None
 
 def read_proximity_sensors():
     """Чтение данных с массива датчиков расстояния."""
     try:
-        url = f"http://{ROBOT_IP}/data/distancesensorarray" #Ссылка для обращения
-        response = requests.get(url) #Отправка GET запроса по адреу url с получением ответа
+        with PROFILER.stage('http.sensors'):
+            response = robot.get("distancesensorarray") #Отправка GET запроса через общее соединение
         #Проверка статуса запроса (200 - успех в HTTP)
         if response.status_code != 200:
-            print(f"Ошибка HTTP: {response.status_code}")
+            log(INFO, f"Ошибка HTTP: {response.status_code}")
             return None
 
         sensor_data = response.json() #Парсинг ответа и преобразование его в массив
         if len(sensor_data) != 9:
-            print("Неверное количество сенсоров!")
+            log(INFO, "Неверное количество сенсоров!")
             return None
-        #Обработка массива-ответа и возврат его
-        return (
-            sensor_data[1],   # left_1
-            sensor_data[2],   # left_2
-            sensor_data[0],   # front
-            sensor_data[8],   # right_1
-            sensor_data[7],   # right_2
-            min(sensor_data[3], sensor_data[4]),  # rear_left
-            min(sensor_data[6], sensor_data[5])   # rear_right
-        )
+        return group_proximity_sensors(sensor_data)
 
     except Exception as error:
-        print(f"Сбой датчиков: {error}")
+        log(INFO, f"Сбой датчиков: {error}")
         return None
 
+def group_proximity_sensors(sensor_data):
+    """9 показаний /data/distancesensorarray -> 7 входов контроллера."""
+    return (
+        sensor_data[1],   # left_1
+        sensor_data[2],   # left_2
+        sensor_data[0],   # front
+        sensor_data[8],   # right_1
+        sensor_data[7],   # right_2
+        min(sensor_data[3], sensor_data[4]),  # rear_left
+        min(sensor_data[6], sensor_data[5])   # rear_right
+    )
+
 def fetch_odometry():
     """Получение данных одометрии."""
     try:
-        response = requests.get(f"http://{ROBOT_IP}/data/odometry")
-        if response.status_code == 200 and len(response.json()) == 7:
-            return response.json()
-        print("Ошибка одометрии!")
+        with PROFILER.stage('http.odometry'):
+            response = robot.get("odometry")
+        if response.status_code == 200:
+            odometry = response.json()
+            if len(odometry) == 7:
+                return odometry
+        log(INFO, "Ошибка одометрии!")
     except Exception as error:
-        print(f"Сбой одометрии: {error}")
+        log(INFO, f"Сбой одометрии: {error}")
     return None
 
 
@@ -73,13 +99,12 @@ def set_movement_velocity(vx, vy, omega):
     """Отправка команд движения."""
     try:
         # Отправка скоростей по координатам на робота в формате json файла
-        response = requests.post(
-            f"http://{ROBOT_IP}/data/omnidrive",
-            json=[vx, vy, omega]
-        )
-        print(f"Скорости: X={vx:.2f}, Y={vy:.2f}, Ω={omega} | Ответ: {response.text}")
+        with PROFILER.stage('http.omnidrive'):
+            response = robot.post("omnidrive", [vx, vy, omega])
+        if telemetry.log_level >= DEBUG: #форматирование строки тоже стоит времени такта
+            print(f"Скорости: X={vx:.2f}, Y={vy:.2f}, Ω={omega} | Ответ: {response.text}")
     except Exception as error:
-        print(f"Ошибка отправки: {error}")
+        log(INFO, f"Ошибка отправки: {error}")
 
 
 def calculate_position_offset(current_x, current_y):
@@ -89,59 +114,168 @@ def calculate_position_offset(current_x, current_y):
 def stop():
     set_movement_velocity(0, 0, 0)
     
-def main_control_loop():
-    """Главный цикл управления."""
+def main_control_loop(mission=None, max_ticks=None):
+    """Главный цикл управления.
+
+    mission - маршрут (mission.Mission): вместо одной точки POINT_X/POINT_Y
+    смещения берутся до точек маршрута по построенному пути.
+    max_ticks - остановка после стольких тактов, даже если цель не достигнута.
+    """
     POINT_TOLERANCE = 0.02
-    #Создаём экземпляр класс NavigationController()
-    nav = NavigationController()
+    telemetry.set_log_level(LOG_LEVEL)
+    PROFILER.enabled = PROFILE
+    #Контроллер из кэша: движки NumPy, такт укладывается в CONTROL_PERIOD (skfuzzy - нет)
+    nav = load_controller()
+    if INFERENCE_CACHE:
+        nav.enable_cache()
     robot_connection = CONNECT() #Подключаемся к Rabotino
 
     if not robot_connection:
         print("Невозможно подключиться!")
         return
 
+    #Фоновый опрос одометрии и датчиков: цикл берёт последние отсчёты, не дожидаясь HTTP
+    odometry_reader = AcquisitionThread(fetch_odometry, CONTROL_PERIOD, name="odometry")
+    #Фильтр применяется в потоке опроса к каждому новому отсчёту, цикл получает уже очищенные значения
+    read_sensors = SensorFilter.default().wrap(read_proximity_sensors) if SENSOR_FILTER else read_proximity_sensors
+    sensor_reader = AcquisitionThread(read_sensors, CONTROL_PERIOD, name="sensors")
+    odometry_reader.start()
+    sensor_reader.start()
+    stale = False
+    #Положение между отсчётами одометрии досчитывается по отправленным уставкам
+    estimator = DeadReckoning(ODOMETRY_HORIZON)
+    last_sample = None
+    #Спутники вращаются вокруг цели - в миссии с несколькими точками центра орбит нет
+    tracker = ObstacleTracker() if OBSTACLE_PREDICTION and mission is None else None
+    #POST уставки - в фоновом потоке: такт не ждёт ответа omnidrive
+    sender = CommandSender(set_movement_velocity)
+    sender.start()
+    #Уставки уходят роботу, только когда меняются (и повтором по таймеру); разгон - по COMMAND_SHAPING
+    shaper = CommandShaper(sender.submit) if COMMAND_SHAPING else CommandShaper.changes_only(sender.submit)
+    #Запись тактов в отдельный каталог на каждый запуск
+    recorder = None
+    if TELEMETRY_DIR:
+        recorder = TelemetryRecorder(os.path.join(TELEMETRY_DIR, time.strftime("%Y%m%d-%H%M%S")))
+
     try:
         #Блок выполняется один раз при старте программы, оносительно него потом сравнение идёт
-        odom_init = fetch_odometry() #Получение одометрии в виде массива
-        if not odom_init:
+        if not odometry_reader.wait_first(timeout=1.0): #Ждём первый отсчёт одометрии
+            print("Нет данных одометрии!")
             return
+        sensor_reader.wait_first(timeout=1.0) #и датчиков, чтобы не начинать с остановки
+        odom_init = odometry_reader.latest.get()[1] #Получение одометрии в виде массива
 
+        #Начало координат - точка старта; оси и курс - как в одометрии (без поворота на курс старта),
+        #в этой же системе карта миссии, цель и центр орбит для прогноза
         base_x, base_y = odom_init[0], odom_init[1] #Извлечение из массива координат (текущих)
 
-        while True:
-            current_odom = fetch_odometry()
-            if not current_odom:
-                continue
-            #вычисление смещения координат
-            current_x = current_odom[0] - base_x
-            current_y = current_odom[1] - base_y
-            sensors = read_proximity_sensors() #сбор данных с сенсоров
-            #если данных нет, то
-            if not sensors:
-                time.sleep(1)
+        ticks = 0
+        deadline = time.perf_counter()
+        tick_start = None
+        while max_ticks is None or ticks < max_ticks:
+            ticks += 1
+            #Сроки тактов t0 + k * CONTROL_PERIOD: пауза - остаток периода, задержки не копятся
+            with PROFILER.stage('sleep'):
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -CONTROL_PERIOD:
+                    deadline = time.perf_counter() #Отстали больше чем на такт - сроки не догоняем пачкой
+            deadline += CONTROL_PERIOD
+            now = time.perf_counter()
+            if tick_start is not None:
+                PROFILER.add('tick', now - tick_start) #Фактический период такта
+            tick_start = now
+            sample = odometry_reader.latest.get()
+            if sample is not last_sample: #пришёл новый отсчёт одометрии - положение по нему
+                last_sample = sample
+                current_odom = sample[1]
+                estimator.update(sample[0], current_odom[0], current_odom[1], current_odom[2])
+            pose = estimator.estimate(time.monotonic()) #положение на текущий момент
+            sensors = sensor_reader.fresh(STALE_LIMIT) #последний отсчёт датчиков
+            #если данных нет или они устарели - стоим, но такты идут с обычной частотой
+            if pose is None or sensors is None:
+                if not stale:
+                    log(INFO, "Данные устарели, остановка.")
+                    shaper.stop(time.monotonic())
+                    estimator.command(time.monotonic(), 0, 0, 0)
+                    stale = True
                 continue
                 #Старт новой итерации цикла (пропуск последующего кода)
-            delta_x, delta_y = calculate_position_offset(current_x, current_y) #Вычисление смещений
-            vx, vy = nav.calculate_velocity(delta_x, delta_y, *sensors) #Направка данных на блок фазификации/дефазификации и после возврат скоростей
+            stale = False
+            #вычисление смещения координат
+            current_x = pose[0] - base_x
+            current_y = pose[1] - base_y
+            if mission is not None:
+                #Препятствия от датчиков на карту (с перепланированием) и смещение до точки пути
+                mission.observe(time.monotonic(), current_x, current_y, pose[2], sensors)
+                delta_x, delta_y = mission.offset(current_x, current_y)
+            else:
+                delta_x, delta_y = calculate_position_offset(current_x, current_y) #Вычисление смещений
+            if tracker is not None:
+                #Показания с учётом прогноза; они же пишутся в телеметрию, чтобы replay видел то же
+                sensors = tracker.update(time.monotonic(), current_x, current_y, pose[2],
+                                         (POINT_X, POINT_Y), sensors)
+            with PROFILER.stage('compute'):
+                vx, vy = nav.calculate_velocity(delta_x, delta_y, *sensors) #Направка данных на блок фазификации/дефазификации и после возврат скоростей
 
             distance = math.hypot(delta_x, delta_y) #Функция вычисления евклидово расстояния
-            if distance <= POINT_TOLERANCE:
-                stop()
+            if (mission.done if mission is not None else distance <= POINT_TOLERANCE):
+                shaper.stop(time.monotonic())
                 print("Задача выполнена")
                 break
 
             # Ограничение скорости (если поменяли лимиты скорости, но не изменили фазификацию)
             vx = max(min(vx, MAX_VELOCITY), -MAX_VELOCITY)
             vy = max(min(vy, MAX_VELOCITY), -MAX_VELOCITY)
-            #Передача управлющего воздейсвия
-            set_movement_velocity(vx, vy, 0)
-            time.sleep(0.02)
+            if recorder is not None:
+                recorder.record(time.monotonic(), current_odom, sensors,
+                                delta_x, delta_y, nav.last_branch, vx, vy)
+            #Передача управлющего воздейсвия (в телеметрии - уставка контроллера, для replay)
+            vx, vy, _ = shaper(time.monotonic(), vx, vy, 0)
+            estimator.command(time.monotonic(), vx, vy, 0)
+        else:
+            log(INFO, f"Лимит тактов {max_ticks}, цель не достигнута.")
 
     except KeyboardInterrupt:
         print("Прервано пользователем.")
     finally:
+        odometry_reader.stop()
+        sensor_reader.stop()
+        sender.stop()
+        sender.join() #Уставка в полёте не должна прийти роботу после остановки
         stop()
+        if recorder is not None:
+            recorder.close()
+            print(f"Телеметрия: {recorder.count} тактов в {recorder.path}, потеряно {recorder.dropped}")
+        #Статистика задержек по эндпоинтам - сколько стоит каждый запрос
+        for line in robot_connection.report():
+            print(line)
+        if PROFILER.enabled:
+            for line in PROFILER.report():
+                print(line)
+        for line in nav.cache_report():
+            print(line)
+        print(estimator.report())
+        print(shaper.report())
+        print(f"Уставок заменено до отправки: {sender.skipped}")
+        if tracker is not None:
+            print(tracker.report())
+        if mission is not None:
+            print(mission.report())
         robot_connection.close()
 
 if __name__ == "__main__":
-    main_control_loop()
\ No newline at end of file
+    if "--async" in sys.argv:
+        #Асинхронный цикл: параллельные запросы и фиксированная частота тактов
+        from async_control import run
+        run()
+    elif "--fleet" in sys.argv:
+        #Несколько роботов в одном цикле asyncio: python main.py --fleet fleet.json
+        from fleet import run
+        run(sys.argv[sys.argv.index("--fleet") + 1])
+    elif "--mission" in sys.argv:
+        #Маршрут из файла: python main.py --mission mission_example.json
+        main_control_loop(Mission.load(sys.argv[sys.argv.index("--mission") + 1]))
+    else:
+        main_control_loop()
\ No newline at end of file
@@ -0,0 +1,508 @@
+"""Маршрут из нескольких точек с планированием пути по карте занятости.
+
+Файл миссии - JSON:
+    {
+      "waypoints": [[0.5, 0.0], [0.5, 0.5], [0.0, 0.5]],
+      "grid": {"resolution": 0.05, "origin": [-0.5, -0.5],
+               "rows": ["..........",
+                        "....##....",
+                        ".........."]}
+    }
+или текстовый файл со строками "x y". Координаты - относительно точки
+старта, как POINT_X/POINT_Y в main. В "rows" первая строка - верхняя
+(наибольший y), "#" - занятая клетка; origin - левый нижний угол карты.
+
+Без карты робот идёт от точки к точке напрямую. С картой путь между
+точками строит DStarLite по клеткам, расширенным на радиус робота, а
+контроллеру подаётся смещение до точки пути на расстоянии LOOKAHEAD.
+Препятствия, замеченные датчиками, отмечаются на карте на OBSTACLE_TTL
+секунд, и путь перестраивается инкрементально - пересчитываются только
+затронутые клетки.
+
+Запуск: python mission.py mission.json            # план и замер перепланирования
+        python mission.py mission.json --simulate # прогон в симуляторе
+"""
+import argparse
+import heapq
+import json
+import math
+import time
+
+import numpy as np
+
+from navigation_core import NavigationCore
+from robot_geometry import ROBOT_RADIUS, SENSOR_DIRECTIONS
+from telemetry import INFO, log
+
+# Шаг по сетке в целых единицах (10 - вдоль оси, 14 - по диагонали): в дробных
+# стоимостях равные ключи D* Lite расходятся на ошибку округления и поиск
+# останавливается раньше времени
+STRAIGHT, DIAGONAL = 10, 14
+NEIGHBORS = ((-1, -1, DIAGONAL), (-1, 0, STRAIGHT), (-1, 1, DIAGONAL), (0, -1, STRAIGHT),
+             (0, 1, STRAIGHT), (1, -1, DIAGONAL), (1, 0, STRAIGHT), (1, 1, DIAGONAL))
+
+
+class OccupancyGrid:
+    """Карта занятости: статические клетки из файла и временные от датчиков.
+
+    Клетка (i, j) - строка i по y, столбец j по x; центр клетки -
+    origin + (j + 0.5, i + 0.5) * resolution.
+    """
+
+    def __init__(self, occupied, resolution, origin=(0.0, 0.0), inflation=ROBOT_RADIUS):
+        self.resolution = resolution
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.shape = occupied.shape
+        self.radius = int(math.ceil(inflation / resolution))  # Расширение в клетках
+        offsets = [(di, dj) for di in range(-self.radius, self.radius + 1)
+                   for dj in range(-self.radius, self.radius + 1)
+                   if di * di + dj * dj <= self.radius * self.radius]
+        self._disk = offsets
+        # Счётчик "сколько препятствий накрывает клетку": блокировки складываются и снимаются
+        self.static = self._inflate(np.argwhere(occupied))
+        self.dynamic = np.zeros(self.shape, dtype=np.int32)
+        # Плоские списки для поиска пути: индексация NumPy по скаляру в цикле медленная
+        self.occupied = (self.static > 0).ravel().tolist()
+        rows, cols = self.shape
+        self.adjacent = [
+            [((i + di) * cols + j + dj, step) for di, dj, step in NEIGHBORS
+             if 0 <= i + di < rows and 0 <= j + dj < cols]
+            for i in range(rows) for j in range(cols)]
+        self._expires = {}  # Клетка-препятствие от датчиков -> момент снятия
+
+    @classmethod
+    def from_rows(cls, rows, resolution, origin=(0.0, 0.0), inflation=ROBOT_RADIUS):
+        occupied = np.array([[c == '#' for c in row] for row in reversed(rows)], dtype=bool)
+        return cls(occupied, resolution, origin, inflation)
+
+    def _inflate(self, cells):
+        count = np.zeros(self.shape, dtype=np.int32)
+        for i, j in cells:
+            for ci, cj in self._covered(i, j):
+                count[ci, cj] += 1
+        return count
+
+    def _covered(self, i, j):
+        rows, cols = self.shape
+        for di, dj in self._disk:
+            ci, cj = i + di, j + dj
+            if 0 <= ci < rows and 0 <= cj < cols:
+                yield ci, cj
+
+    def blocked(self, i, j):
+        return self.occupied[i * self.shape[1] + j]
+
+    def cell(self, x, y):
+        """Клетка точки (x, y) или None вне карты."""
+        j = int(math.floor((x - self.origin[0]) / self.resolution))
+        i = int(math.floor((y - self.origin[1]) / self.resolution))
+        if 0 <= i < self.shape[0] and 0 <= j < self.shape[1]:
+            return i, j
+        return None
+
+    def center(self, i, j):
+        return (self.origin[0] + (j + 0.5) * self.resolution,
+                self.origin[1] + (i + 0.5) * self.resolution)
+
+    def mark(self, x, y, expires):
+        """Препятствие в точке (x, y) до момента expires. Возвращает клетки, сменившие состояние."""
+        cell = self.cell(x, y)
+        if cell is None:
+            return []
+        known = cell in self._expires
+        self._expires[cell] = expires
+        if known:
+            return []  # Уже отмечено - только продлеваем срок
+        changed = []
+        for ci, cj in self._covered(*cell):
+            if self.dynamic[ci, cj] == 0 and self.static[ci, cj] == 0:
+                changed.append((ci, cj))
+                self.occupied[ci * self.shape[1] + cj] = True
+            self.dynamic[ci, cj] += 1
+        return changed
+
+    def expire(self, now):
+        """Снять препятствия с истёкшим сроком. Возвращает освободившиеся клетки."""
+        changed = []
+        for cell in [c for c, t in self._expires.items() if t <= now]:
+            del self._expires[cell]
+            for ci, cj in self._covered(*cell):
+                self.dynamic[ci, cj] -= 1
+                if self.dynamic[ci, cj] == 0 and self.static[ci, cj] == 0:
+                    changed.append((ci, cj))
+                    self.occupied[ci * self.shape[1] + cj] = False
+        return changed
+
+
+class DStarLite:
+    """Кратчайший путь по 8-связной сетке с инкрементальным перепланированием.
+
+    Поиск идёт от цели к роботу; первый compute() - обычный A* (в обратную
+    сторону) с октильной эвристикой. После update_cells() пересчитываются
+    только вершины, чья стоимость пути изменилась (Koenig, Likhachev, D* Lite).
+    Вход в занятую клетку стоит бесконечность, выход из неё разрешён - робот,
+    оказавшийся в расширенной зоне препятствия, всё равно получает путь.
+    """
+
+    def __init__(self, grid, start, goal):
+        self.grid = grid
+        self.cols = grid.shape[1]
+        size = grid.shape[0] * grid.shape[1]
+        self.g = [math.inf] * size
+        self.rhs = [math.inf] * size
+        self.start = self._index(start)
+        self.goal = self._index(goal)
+        self.km = 0.0
+        self._open = {}  # Вершина -> актуальный ключ; в куче возможны устаревшие записи
+        self._heap = []
+        self.expanded = 0  # Раскрыто вершин за последний compute()
+        self.rhs[self.goal] = 0
+        self._push(self.goal)
+
+    def _index(self, cell):
+        return cell[0] * self.cols + cell[1]
+
+    def _cell(self, s):
+        return divmod(s, self.cols)
+
+    def _heuristic(self, a, b):
+        ai, aj = divmod(a, self.cols)
+        bi, bj = divmod(b, self.cols)
+        di, dj = abs(ai - bi), abs(aj - bj)
+        return STRAIGHT * max(di, dj) + (DIAGONAL - STRAIGHT) * min(di, dj)
+
+    def _key(self, s):
+        m = min(self.g[s], self.rhs[s])
+        return (m + self._heuristic(self.start, s) + self.km, m)
+
+    def _push(self, s):
+        key = self._key(s)
+        self._open[s] = key
+        heapq.heappush(self._heap, (key, s))
+
+    def _rhs(self, s):
+        """Наименьшая стоимость пути из s через соседей (вход в занятую клетку запрещён)."""
+        g, occupied = self.g, self.grid.occupied
+        best = math.inf
+        for n, step in self.grid.adjacent[s]:
+            if not occupied[n] and step + g[n] < best:
+                best = step + g[n]
+        return best
+
+    def _update_vertex(self, s):
+        if self.g[s] != self.rhs[s]:
+            self._push(s)
+        else:
+            self._open.pop(s, None)
+
+    def _top(self):
+        """Наименьший актуальный ключ очереди (устаревшие записи выбрасываются)."""
+        heap = self._heap
+        while heap:
+            key, s = heap[0]
+            if self._open.get(s) == key:
+                return key, s
+            heapq.heappop(heap)
+        return (math.inf, math.inf), None
+
+    def compute(self):
+        """Довести g до согласованного состояния на пути от робота к цели."""
+        self.expanded = 0
+        g, rhs = self.g, self.rhs
+        adjacent, occupied = self.grid.adjacent, self.grid.occupied
+        goal = self.goal
+        while True:
+            key, s = self._top()
+            start = self.start
+            if s is None or (key >= self._key(start) and rhs[start] == g[start]):
+                break
+            heapq.heappop(self._heap)
+            new_key = self._key(s)
+            if key < new_key:
+                self._push(s)
+                continue
+            del self._open[s]
+            self.expanded += 1
+            # Предшественники s - его соседи; шаг в s стоит step, в занятую s - бесконечность
+            if g[s] > rhs[s]:
+                g[s] = rhs[s]
+                if occupied[s]:
+                    continue  # Войти в s нельзя - соседям она ничего не даёт
+                for n, step in adjacent[s]:
+                    if n != goal and step + g[s] < rhs[n]:
+                        rhs[n] = step + g[s]
+                        self._update_vertex(n)
+            else:
+                old = g[s]
+                g[s] = math.inf
+                if s != goal:
+                    rhs[s] = self._rhs(s)
+                self._update_vertex(s)
+                if occupied[s]:
+                    continue
+                for n, step in adjacent[s]:
+                    if n != goal and rhs[n] == step + old:  # rhs[n] шёл через s - пересчитать
+                        rhs[n] = self._rhs(n)
+                        self._update_vertex(n)
+        return g[self.start] < math.inf
+
+    def move_to(self, cell):
+        """Робот перешёл в клетку cell: сдвиг эвристики без перестройки очереди."""
+        s = self._index(cell)
+        if s != self.start:
+            self.km += self._heuristic(self.start, s)
+            self.start = s
+
+    def update_cells(self, cells):
+        """Клетки сменили занятость: обновить вершины, из которых в них входят."""
+        g, rhs, occupied = self.g, self.rhs, self.grid.occupied
+        for cell in cells:
+            v = self._index(cell)
+            for n, step in self.grid.adjacent[v]:
+                if n == self.goal:
+                    continue
+                if not occupied[v]:
+                    if step + g[v] < rhs[n]:  # Клетка освободилась - путь через неё короче
+                        rhs[n] = step + g[v]
+                        self._update_vertex(n)
+                elif rhs[n] == step + g[v]:  # Путь шёл через занятую теперь клетку
+                    rhs[n] = self._rhs(n)
+                    self._update_vertex(n)
+
+    def path(self, limit=None):
+        """Клетки пути от робота к цели (жадно по g) или None, если пути нет."""
+        s = self.start
+        if self.g[s] == math.inf and s != self.goal:
+            return None
+        path = [self._cell(s)]
+        limit = limit or len(self.g)
+        while s != self.goal and len(path) <= limit:
+            occupied = self.grid.occupied
+            s = min(self.grid.adjacent[s],
+                    key=lambda item: math.inf if occupied[item[0]] else item[1] + self.g[item[0]])[0]
+            path.append(self._cell(s))
+        return path
+
+
+class Mission:
+    """Последовательность точек маршрута; выдаёт смещения для calculate_velocity."""
+
+    WAYPOINT_TOLERANCE = 0.05  # Промежуточная точка маршрута считается пройденной (м)
+    LOOKAHEAD = 0.2  # Расстояние до точки пути, на которую наводится контроллер (м)
+    OBSTACLE_TTL = 2.0  # Сколько секунд замеченное датчиком препятствие держится на карте
+    MARK_RANGE = NavigationCore.OBSTACLE_THRESHOLD  # Показания ближе - препятствие на карту
+
+    def __init__(self, waypoints, grid=None, tolerance=0.02):
+        self.waypoints = [(float(x), float(y)) for x, y in waypoints]
+        self.grid = grid
+        self.tolerance = tolerance  # Точность в последней точке, как POINT_TOLERANCE
+        self.index = 0  # Текущая точка маршрута
+        self.planner = None
+        self.path = None  # Точки пути (м) до текущей точки маршрута
+        self.plans = 0      # Полных построений пути
+        self.replans = 0    # Инкрементальных перепланирований
+        self.expanded = 0   # Раскрыто вершин за всё время
+        self.plan_seconds = 0.0
+
+    @classmethod
+    def load(cls, path, tolerance=0.02):
+        """Миссия из JSON (waypoints и необязательная grid) или текста "x y" по строкам."""
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        if not path.endswith('.json'):
+            waypoints = [tuple(map(float, line.replace(',', ' ').split()))
+                         for line in text.splitlines() if line.strip() and not line.startswith('#')]
+            return cls(waypoints, tolerance=tolerance)
+        data = json.loads(text)
+        grid = None
+        if 'grid' in data:
+            spec = data['grid']
+            grid = OccupancyGrid.from_rows(spec['rows'], spec['resolution'],
+                                           spec.get('origin', (0.0, 0.0)))
+        return cls(data['waypoints'], grid, tolerance)
+
+    @property
+    def done(self):
+        return self.index >= len(self.waypoints)
+
+    @property
+    def target(self):
+        return None if self.done else self.waypoints[self.index]
+
+    def _plan(self, x, y):
+        """Полное построение пути от (x, y) до текущей точки маршрута."""
+        start = self.grid.cell(x, y)
+        goal = self.grid.cell(*self.target)
+        self.planner = None
+        self.path = None
+        if start is None or goal is None:
+            log(INFO, "Точка маршрута вне карты, движение напрямую")
+            return
+        begin = time.perf_counter()
+        self.planner = DStarLite(self.grid, start, goal)
+        self.planner.compute()
+        self.plan_seconds += time.perf_counter() - begin
+        self.plans += 1
+        self.expanded += self.planner.expanded
+        self._extract()
+
+    def _extract(self):
+        cells = self.planner.path()
+        if cells is None:
+            log(INFO, "Путь к точке маршрута перекрыт, движение напрямую")
+            self.path = None
+            return
+        self.path = [self.grid.center(i, j) for i, j in cells[1:]]
+        if self.path:
+            self.path[-1] = self.target  # Последняя точка - сама цель, а не центр клетки
+
+    def _replan(self, changed):
+        begin = time.perf_counter()
+        self.planner.update_cells(changed)
+        self.planner.compute()
+        self.plan_seconds += time.perf_counter() - begin
+        self.replans += 1
+        self.expanded += self.planner.expanded
+        self._extract()
+
+    def observe(self, t, x, y, phi, sensors):
+        """Отметить на карте препятствия по показаниям датчиков и перепланировать.
+
+        (x, y) - положение относительно старта в осях одометрии, phi - курс
+        робота в тех же осях, sensors - 7 входов контроллера.
+        """
+        if self.grid is None or self.done:
+            return
+        changed = self.grid.expire(t)
+        for direction, distance in zip(SENSOR_DIRECTIONS, sensors):
+            if distance < self.MARK_RANGE:
+                reach = ROBOT_RADIUS + distance
+                changed += self.grid.mark(x + reach * math.cos(phi + direction),
+                                          y + reach * math.sin(phi + direction),
+                                          t + self.OBSTACLE_TTL)
+        if changed and self.planner is not None:
+            cell = self.grid.cell(x, y)
+            if cell is not None:
+                self.planner.move_to(cell)
+            self._replan(changed)
+
+    def offset(self, x, y):
+        """Смещение (dx, dy) от (x, y) к текущей цели контроллера.
+
+        Переключает точки маршрута по мере прохождения; после последней
+        точки (done) возвращает смещение до неё.
+        """
+        while not self.done:
+            tx, ty = self.target
+            last = self.index == len(self.waypoints) - 1
+            if math.hypot(tx - x, ty - y) > (self.tolerance if last else self.WAYPOINT_TOLERANCE):
+                break
+            self.index += 1
+            self.planner = None
+            self.path = None
+        if self.done:
+            tx, ty = self.waypoints[-1]
+            return tx - x, ty - y
+
+        if self.grid is not None and self.planner is None:
+            self._plan(x, y)
+        if not self.path:
+            tx, ty = self.target
+            return tx - x, ty - y
+
+        # Точки пути ближе LOOKAHEAD пройдены; наводимся на первую дальнюю
+        path = self.path
+        k = 0
+        while k < len(path) - 1 and math.hypot(path[k][0] - x, path[k][1] - y) < self.LOOKAHEAD:
+            k += 1
+        if k:
+            del path[:k]
+        return path[0][0] - x, path[0][1] - y
+
+    def report(self):
+        return (f"Миссия: пройдено точек {self.index}/{len(self.waypoints)}, "
+                f"построений пути {self.plans}, перепланирований {self.replans}, "
+                f"раскрыто вершин {self.expanded}, планирование {self.plan_seconds * 1e3:.1f} мс")
+
+
+def bench_replan(mission):
+    """Перекрыть путь к первой точке: инкрементальное перепланирование против нового поиска."""
+    x, y = 0.0, 0.0
+    mission.offset(x, y)
+    if mission.planner is None or not mission.path:
+        print("Нет пути для замера")
+        return
+    print(f"Путь к {mission.target}: {len(mission.path)} точек, "
+          f"раскрыто {mission.planner.expanded} вершин, {mission.plan_seconds * 1e3:.2f} мс")
+
+    # Препятствие замечено на пути в пределах дальности датчиков от робота
+    path = mission.path
+    bx, by = next((p for p in path if math.hypot(p[0] - x, p[1] - y) >= 0.35), path[-1])
+    grid = mission.grid
+    begin = time.perf_counter()
+    changed = grid.mark(bx, by, math.inf)
+    mission.planner.update_cells(changed)
+    mission.planner.compute()
+    incremental = time.perf_counter() - begin
+    incremental_expanded = mission.planner.expanded
+
+    begin = time.perf_counter()
+    fresh = DStarLite(grid, grid.cell(x, y), grid.cell(*mission.target))
+    fresh.compute()
+    full = time.perf_counter() - begin
+    if fresh.g[fresh.start] != mission.planner.g[mission.planner.start]:
+        raise AssertionError("Инкрементальный и полный поиск дали разную длину пути")
+    print(f"Перекрытие пути: инкрементально {incremental_expanded} вершин за {incremental * 1e3:.2f} мс, "
+          f"заново {fresh.expanded} вершин за {full * 1e3:.2f} мс")
+
+
+def simulate(mission, satellites=0, seed=0, max_time=120.0, period=0.02, max_velocity=0.1):
+    """Прогон миссии в RobotinoWorld без HTTP, такт как в main_control_loop.
+
+    satellites - число спутников на орбитах вокруг первой точки маршрута:
+    их замечают датчики, и путь перепланируется.
+    """
+    import numpy as np
+    import telemetry
+    from controller_cache import load_controller
+    from simulator import RobotinoWorld, Satellites, group_sensors
+
+    telemetry.set_log_level('info')
+    nav = load_controller()
+    orbits = None
+    if satellites:
+        orbits = Satellites.random(mission.waypoints[0], np.random.default_rng(seed), satellites)
+    world = RobotinoWorld(orbits)
+    while world.time < max_time:
+        x, y, phi = world.pose
+        sensors = group_sensors(world.distance_sensors())
+        mission.observe(world.time, x, y, phi, sensors)
+        dx, dy = mission.offset(x, y)
+        if mission.done:
+            break
+        vx, vy = nav.calculate_velocity(dx, dy, *sensors)
+        vx = max(min(vx, max_velocity), -max_velocity)
+        vy = max(min(vy, max_velocity), -max_velocity)
+        world.set_command(vx, vy, 0)
+        world.advance(period)
+    print(f"Время симуляции {world.time:.1f} с, положение ({world.pose[0]:.3f}, {world.pose[1]:.3f}), "
+          f"столкновений {world.collisions}")
+    print(mission.report())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Миссия по точкам маршрута")
+    parser.add_argument('mission')
+    parser.add_argument('--simulate', action='store_true', help="прогон в симуляторе без HTTP")
+    parser.add_argument('--satellites', type=int, default=0, help="спутники вокруг первой точки")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.simulate:
+        simulate(Mission.load(args.mission), args.satellites, args.seed)
+    else:
+        mission = Mission.load(args.mission)
+        print(f"Точек маршрута: {len(mission.waypoints)}, карта: "
+              f"{mission.grid.shape if mission.grid is not None else 'нет'}")
+        if mission.grid is not None:
+            bench_replan(mission)
@@ -2,13 +2,35 @@ import numpy as np
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
 
-class NavigationController:
+from fuzzy_table import GoalLookupTable
+from fuzzy_numpy import MamdaniEngine
+from navigation_core import NavigationCore
+import telemetry
+from telemetry import DEBUG, INFO, log
+
+class NavigationController(NavigationCore):
     """Контроллер навигации с использованием нечеткой логики."""
 
-    OBSTACLE_THRESHOLD = 0.25  # Порог обнаружения препятствий
-    SENSOR_LIMIT = 0.42  # Максимальное расстояние сенсоров
+    TABLE_TOLERANCE = 0.01  # Допустимая ошибка таблицы goal_sim (м/с)
+    BACKENDS = ('skfuzzy', 'numpy')  # Движки нечёткого вывода во время работы
+    DANGER_DISTANCE = (0.17, 0.20)  # Переход термов dangeros -> safe сенсоров (м)
+    VELOCITY_SCALE = 1.0  # Масштаб термов выходных скоростей
+
+    # Константы, которые можно переопределить через params (подбор параметров)
+    TUNABLE = ('OBSTACLE_THRESHOLD', 'SENSOR_LIMIT', 'DANGER_DISTANCE', 'VELOCITY_SCALE')
+
+    def __init__(self, compiled=False, backend='skfuzzy', params=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Неизвестный движок: {backend}")
+        self.backend = backend
+        self.last_branch = self.BRANCH_GOAL
+
+        # Значения из params заменяют константы класса только для этого экземпляра
+        for name, value in (params or {}).items():
+            if name not in self.TUNABLE:
+                raise ValueError(f"Неизвестный параметр: {name}")
+            setattr(self, name, value)
 
-    def __init__(self):
         # Инициализация входных переменн ых
         self.position_x = ctrl.Antecedent(np.arange(-2, 2, 0.01), 'position_x')
         self.position_y = ctrl.Antecedent(np.arange(-2, 2, 0.01), 'position_y')
@@ -26,6 +48,25 @@ class NavigationController:
         self._create_rules()
         self._init_control_systems()
 
+        # Скомпилированный режим: goal_sim заменяется таблицей
+        self.goal_table = None
+        if compiled:
+            self._compile_goal_table()
+
+    def _compile_goal_table(self):
+        """Предвычисление goal_sim на сетке (dx, dy) с проверкой точности."""
+        grid_x = GoalLookupTable.default_grid(self.position_x.universe)
+        grid_y = GoalLookupTable.default_grid(self.position_y.universe)
+        table = GoalLookupTable(self.goal_sim, grid_x, grid_y)
+
+        error = table.verify()
+        if error > self.TABLE_TOLERANCE:
+            raise ValueError(
+                f"Ошибка таблицы {error:.4f} м/с превышает допуск {self.TABLE_TOLERANCE} м/с"
+            )
+        print(f"Таблица goal_sim: {len(grid_x)}x{len(grid_y)}, макс. ошибка {error:.5f} м/с")
+        self.goal_table = table
+
     def _init_sensors(self, universe):
         """Инициализация сенсоров препятствий."""
         #Тоже входные
@@ -74,12 +115,14 @@ class NavigationController:
         )
 
         # Для сенсоров
+        near, far = self.DANGER_DISTANCE
         for sensor in [self.sensor_left_front, self.sensor_left_rear,
                        self.sensor_front, self.sensor_right_front,
                        self.sensor_right_rear, self.sensor_back_left,
                        self.sensor_back_right]:
-            sensor['dangeros'] = fuzz.trapmf(sensor.universe, [0, 0, 0.17, 0.20])
-            sensor['safe'] = fuzz.trapmf(sensor.universe, [0.17, 0.20, 0.42, 0.42])
+            sensor['dangeros'] = fuzz.trapmf(sensor.universe, [0, 0, near, far])
+            sensor['safe'] = fuzz.trapmf(
+                sensor.universe, [near, far, self.SENSOR_LIMIT, self.SENSOR_LIMIT])
 
         # Для выходных скоростей
 
@@ -88,18 +131,21 @@ class NavigationController:
 
     def _configure_velocity(self, var, neg_dir, pos_dir):
         """Настройка функций принадлежности (фазификации) для скоростей"""
+        def points(*values):
+            return [v * self.VELOCITY_SCALE for v in values]
+
         # Отрицательное направление (X- или Y-)
-        var[f'{neg_dir}_fast'] = fuzz.trapmf(var.universe, [-0.3, -0.3, -0.22, -0.2])
-        var[f'{neg_dir}_med'] = fuzz.trapmf(var.universe, [-0.22, -0.2, -0.12, -0.1])
-        var[f'{neg_dir}_slow'] = fuzz.trapmf(var.universe, [-0.12, -0.1, -0.025, 0])
+        var[f'{neg_dir}_fast'] = fuzz.trapmf(var.universe, points(-0.3, -0.3, -0.22, -0.2))
+        var[f'{neg_dir}_med'] = fuzz.trapmf(var.universe, points(-0.22, -0.2, -0.12, -0.1))
+        var[f'{neg_dir}_slow'] = fuzz.trapmf(var.universe, points(-0.12, -0.1, -0.025, 0))
 
         # Нейтральное положение
-        var['stop'] = fuzz.trimf(var.universe, [-0.025, 0, 0.025])
+        var['stop'] = fuzz.trimf(var.universe, points(-0.025, 0, 0.025))
 
         # Положительное направление (X+ или Y+)
-        var[f'{pos_dir}_slow'] = fuzz.trapmf(var.universe, [0, 0.025, 0.1, 0.12])
-        var[f'{pos_dir}_med'] = fuzz.trapmf(var.universe, [0.10, 0.12, 0.20, 0.22])
-        var[f'{pos_dir}_fast'] = fuzz.trapmf(var.universe, [0.20, 0.22, 0.30, 0.30])
+        var[f'{pos_dir}_slow'] = fuzz.trapmf(var.universe, points(0, 0.025, 0.1, 0.12))
+        var[f'{pos_dir}_med'] = fuzz.trapmf(var.universe, points(0.10, 0.12, 0.20, 0.22))
+        var[f'{pos_dir}_fast'] = fuzz.trapmf(var.universe, points(0.20, 0.22, 0.30, 0.30))
 
     def _create_rules(self):
         """Создание системы правил для линейного движения."""
@@ -236,8 +282,22 @@ class NavigationController:
         self.obstacle_sim = ctrl.ControlSystemSimulation(self.obstacle_system)
         self.goal_sim = ctrl.ControlSystemSimulation(self.goal_system)
 
+        # Те же правила, скомпилированные в массивы NumPy
+        self.goal_engine = None
+        self.obstacle_engine = None
+        if self.backend == 'numpy':
+            self.goal_engine, self.obstacle_engine = self._build_numpy_engines()
+
+    def _build_numpy_engines(self):
+        """Компиляция goal_rules и obstacle_rules в движки MamdaniEngine."""
+        return (MamdaniEngine.from_rules(self.goal_rules, self.GOAL_INPUTS, self.OUTPUTS),
+                MamdaniEngine.from_rules(self.obstacle_rules, self.OBSTACLE_INPUTS, self.OUTPUTS))
+
     def _move_to_target(self, dx, dy):
         """Движение к цели."""
+        if self.goal_table is not None or self.goal_engine is not None:
+            return super()._move_to_target(dx, dy)
+
         self.goal_sim.input['position_x'] = dx
         self.goal_sim.input['position_y'] = dy
 
@@ -247,55 +307,9 @@ class NavigationController:
             vy = self.goal_sim.output['velocity_y']
             return self._adjust_speeds(dx, dy, vx, vy)
         except Exception as e:
-            print(f"Ошибка расчета: {e}")
+            log(INFO, f"Ошибка расчета: {e}")
             return 0.0, 0.0
 
-    def calculate_velocity(self, dx, dy, *sensors):
-        """Вычисление скоростей движения."""
-        # Проверка входных данных
-        if len(sensors) != 7:
-            raise ValueError("Требуется 7 значений сенсоров")
-
-        # Создание словаря с данными сенсоров
-        sensor_data = {
-            'left_front': sensors[0],
-            'left_rear': sensors[1],
-            'front': sensors[2],
-            'right_front': sensors[3],
-            'right_rear': sensors[4],
-            'back_left': sensors[5],
-            'back_right': sensors[6]
-        }
-
-        # Логирование (для отладки)
-        print(f"Данные сенсоров: {sensor_data}")
-
-        if self._has_obstacles(sensors):
-            vx, vy = self._avoid_obstacles(dy, dx, sensor_data)
-            return vx, vy  # Возвращаем вычисленные скорости
-        else:
-            return self._move_to_target(dx, dy)  # Возвращаем вычисленные скорости
-
-    def _adjust_speeds(self, dx, dy, vx, vy):
-        """Корректировка скоростей по главной оси."""
-
-        main_axis = max(abs(dx), abs(dy), 1e-4) #определение наибольшего параметра
-        scale_factor = min(abs(dx), abs(dy)) / main_axis #Поправочный коэффициент
-
-        #Проверки на необхдимость корректровки скоростей
-        if abs(dx) > abs(dy):
-            vy *= scale_factor
-        else:
-            vx *= scale_factor
-        #обрезание массива, если есть слишком низкие или высокие уставки
-        return (
-            np.clip(vx, -0.3, 0.3),
-            np.clip(vy, -0.3, 0.3)
-        )
-
-    def _has_obstacles(self, sensors):
-        """Проверка наличия препятствий."""
-        return any(s < self.OBSTACLE_THRESHOLD for s in sensors)
     """
     def _avoid_obstacles(self, dy, sensor_data):
         print(f"Вызвана функция _avoid_obstacles с dy = {dy}")  # Проверка вызова функции
@@ -365,6 +379,9 @@ class NavigationController:
     """
     def _avoid_obstacles(self, dy, dx, sensor_data):
 
+        if self.obstacle_engine is not None:
+            return super()._avoid_obstacles(dy, dx, sensor_data)
+
         self.obstacle_sim.input['position_y'] = dy
         self.obstacle_sim.input['position_x'] = dx
         self.obstacle_sim.input['left_front'] = 0.0
@@ -383,7 +400,8 @@ class NavigationController:
         self.obstacle_sim.input['back_left'] = sensor_data['back_left']
         self.obstacle_sim.input['back_right'] = sensor_data['back_right']
         self.obstacle_sim.input['position_y'] = dy
-        print("Применяемые правила:", self.obstacle_sim.ctrl.rules)
+        if telemetry.log_level >= DEBUG:
+            print("Применяемые правила:", self.obstacle_sim.ctrl.rules)
 
         try:
             self.obstacle_sim.compute()
@@ -393,7 +411,7 @@ class NavigationController:
                 self.obstacle_sim.output['velocity_y']
             )
         except Exception as e:
-            print(f"Ошибка расчёта/работы: {e}")
+            log(INFO, f"Ошибка расчёта/работы: {e}")
             return 0.0, 0.0
 
 
@@ -0,0 +1,217 @@
+import numpy as np
+
+from inference_cache import InferenceCache
+from profiler import PROFILER
+import telemetry
+from telemetry import DEBUG, INFO, log
+
+
+class NavigationCore:
+    """Рабочая часть контроллера навигации без skfuzzy.
+
+    Считает скорости на скомпилированных движках MamdaniEngine и таблице
+    GoalLookupTable. NavigationController строит их из правил skfuzzy;
+    controller_cache загружает готовые массивы с диска в этот класс напрямую.
+    """
+
+    OBSTACLE_THRESHOLD = 0.25  # Порог обнаружения препятствий
+    SENSOR_LIMIT = 0.42  # Максимальное расстояние сенсоров
+
+    # Порядок входов систем для движка NumPy
+    SENSOR_LABELS = ('left_front', 'left_rear', 'front', 'right_front',
+                     'right_rear', 'back_left', 'back_right')
+    GOAL_INPUTS = ('position_x', 'position_y')
+    OBSTACLE_INPUTS = GOAL_INPUTS + SENSOR_LABELS
+    OUTPUTS = ('velocity_x', 'velocity_y')
+
+    # Ветка последнего вызова calculate_velocity (поле branch телеметрии)
+    BRANCH_GOAL = 0
+    BRANCH_OBSTACLE = 1
+
+    # Кэш вывода (enable_cache): шаг квантования входов и размер
+    POSITION_QUANTUM = 0.005  # м, для dx/dy
+    SENSOR_QUANTUM = 0.01  # м, шаг универсума сенсоров
+    CACHE_SIZE = 4096
+    goal_cache = None
+    obstacle_cache = None
+    batch_engines = None  # Движки NumPy только для пакетного вывода, если скалярный идёт через skfuzzy
+
+    def __init__(self, goal_engine, obstacle_engine, goal_table=None, params=None):
+        self.backend = 'numpy'
+        self.goal_engine = goal_engine
+        self.obstacle_engine = obstacle_engine
+        self.goal_table = goal_table
+        self.last_branch = self.BRANCH_GOAL
+        for name, value in (params or {}).items():
+            setattr(self, name, value)
+
+    def _build_numpy_engines(self):
+        raise RuntimeError("Движки NumPy не заданы")
+
+    def _numpy_engines(self):
+        """(goal_engine, obstacle_engine) для calculate_velocity_batch.
+
+        Без движков скалярного вывода они собираются в batch_engines и
+        не подменяют ветки calculate_velocity.
+        """
+        if self.obstacle_engine is not None:
+            return self.goal_engine, self.obstacle_engine
+        if self.batch_engines is None:
+            self.batch_engines = self._build_numpy_engines()
+        return self.batch_engines
+
+    def enable_cache(self, position_quantum=None, sensor_quantum=None, maxsize=None):
+        """Включение LRU-кэша вывода для обеих веток calculate_velocity.
+
+        Входы округляются до шага квантования, поэтому скорости считаются
+        в узлах сетки: при шагах по умолчанию отличие от точного вывода -
+        доли см/с, а такты с почти неизменными входами не пересчитываются.
+        """
+        pq = position_quantum or self.POSITION_QUANTUM
+        sq = sensor_quantum or self.SENSOR_QUANTUM
+        maxsize = maxsize or self.CACHE_SIZE
+        labels = self.SENSOR_LABELS
+        self.goal_cache = InferenceCache(self._move_to_target, (pq, pq), maxsize)
+        self.obstacle_cache = InferenceCache(
+            lambda dx, dy, *s: self._avoid_obstacles(dy, dx, dict(zip(labels, s))),
+            (pq, pq) + (sq,) * len(labels), maxsize)
+
+    def cache_report(self):
+        """Строки статистики кэша по веткам (пусто, если кэш выключен)."""
+        if self.goal_cache is None:
+            return []
+        return [f"Кэш goal: {self.goal_cache}", f"Кэш obstacle: {self.obstacle_cache}"]
+
+    def _move_to_target(self, dx, dy):
+        """Движение к цели."""
+        if self.goal_table is not None:
+            vx, vy = self.goal_table.lookup(dx, dy)
+            if np.isnan(vx) or np.isnan(vy):
+                log(INFO, "Ошибка расчета: точка вне области определения правил")
+                return 0.0, 0.0
+            return self._adjust_speeds(dx, dy, vx, vy)
+
+        vx, vy = self.goal_engine.compute(dx, dy)
+        if np.isnan(vx) or np.isnan(vy):
+            log(INFO, "Ошибка расчета: нет сработавших правил")
+            return 0.0, 0.0
+        return self._adjust_speeds(dx, dy, vx, vy)
+
+    def calculate_velocity(self, dx, dy, *sensors):
+        """Вычисление скоростей движения."""
+        # Проверка входных данных
+        if len(sensors) != 7:
+            raise ValueError("Требуется 7 значений сенсоров")
+
+        # Создание словаря с данными сенсоров
+        sensor_data = {
+            'left_front': sensors[0],
+            'left_rear': sensors[1],
+            'front': sensors[2],
+            'right_front': sensors[3],
+            'right_rear': sensors[4],
+            'back_left': sensors[5],
+            'back_right': sensors[6]
+        }
+
+        # Логирование (для отладки); строка форматируется только на уровне DEBUG
+        if telemetry.log_level >= DEBUG:
+            print(f"Данные сенсоров: {sensor_data}")
+
+        if self._has_obstacles(sensors):
+            self.last_branch = self.BRANCH_OBSTACLE
+            with PROFILER.stage('nav.obstacle'):
+                if self.obstacle_cache is not None:
+                    vx, vy = self.obstacle_cache(dx, dy, *sensors)
+                else:
+                    vx, vy = self._avoid_obstacles(dy, dx, sensor_data)
+            return vx, vy  # Возвращаем вычисленные скорости
+        else:
+            self.last_branch = self.BRANCH_GOAL
+            with PROFILER.stage('nav.goal'):
+                if self.goal_cache is not None:
+                    return self.goal_cache(dx, dy)
+                return self._move_to_target(dx, dy)  # Возвращаем вычисленные скорости
+
+    def calculate_velocity_batch(self, dx, dy, sensors):
+        """Вычисление скоростей для массива состояний.
+
+        dx, dy - массивы формы (N,), sensors - массив (N, 7) в порядке
+        calculate_velocity. Возвращает массивы vx, vy формы (N,).
+        """
+        dx = np.asarray(dx, dtype=float)
+        dy = np.asarray(dy, dtype=float)
+        sensors = np.asarray(sensors, dtype=float)
+        if sensors.ndim != 2 or sensors.shape[1] != 7:
+            raise ValueError("Требуется 7 значений сенсоров")
+
+        goal_engine, obstacle_engine = self._numpy_engines()
+
+        vx = np.zeros(len(dx))
+        vy = np.zeros(len(dx))
+        obstacle = self._has_obstacles_batch(sensors)
+
+        # Ветка обхода препятствий
+        idx = np.flatnonzero(obstacle)
+        if len(idx):
+            out = obstacle_engine.compute_batch(
+                np.column_stack([dx[idx], dy[idx], sensors[idx]]))
+            vx[idx], vy[idx] = out[:, 0], out[:, 1]
+
+        # Ветка движения к цели
+        idx = np.flatnonzero(~obstacle)
+        if len(idx):
+            if self.goal_table is not None:
+                gx, gy = self.goal_table.lookup_batch(dx[idx], dy[idx])
+            else:
+                out = goal_engine.compute_batch(np.column_stack([dx[idx], dy[idx]]))
+                gx, gy = out[:, 0], out[:, 1]
+            vx[idx], vy[idx] = self._adjust_speeds_batch(dx[idx], dy[idx], gx, gy)
+
+        # Нет сработавших правил - как при исключении в skfuzzy: стоим
+        failed = np.isnan(vx) | np.isnan(vy)
+        vx[failed] = 0.0
+        vy[failed] = 0.0
+        return vx, vy
+
+    def _adjust_speeds_batch(self, dx, dy, vx, vy):
+        """Векторная версия _adjust_speeds."""
+        ax, ay = np.abs(dx), np.abs(dy)
+        scale_factor = np.minimum(ax, ay) / np.maximum(np.maximum(ax, ay), 1e-4)
+        x_main = ax > ay
+        vx = np.where(x_main, vx, vx * scale_factor)
+        vy = np.where(x_main, vy * scale_factor, vy)
+        return np.clip(vx, -0.3, 0.3), np.clip(vy, -0.3, 0.3)
+
+    def _adjust_speeds(self, dx, dy, vx, vy):
+        """Корректировка скоростей по главной оси."""
+
+        main_axis = max(abs(dx), abs(dy), 1e-4) #определение наибольшего параметра
+        scale_factor = min(abs(dx), abs(dy)) / main_axis #Поправочный коэффициент
+
+        #Проверки на необхдимость корректровки скоростей
+        if abs(dx) > abs(dy):
+            vy *= scale_factor
+        else:
+            vx *= scale_factor
+        #обрезание массива, если есть слишком низкие или высокие уставки
+        return (
+            np.clip(vx, -0.3, 0.3),
+            np.clip(vy, -0.3, 0.3)
+        )
+
+    def _has_obstacles(self, sensors):
+        """Проверка наличия препятствий."""
+        return any(s < self.OBSTACLE_THRESHOLD for s in sensors)
+
+    def _has_obstacles_batch(self, sensors):
+        """Проверка наличия препятствий для каждой строки массива (N, 7)."""
+        return (sensors < self.OBSTACLE_THRESHOLD).any(axis=1)
+
+    def _avoid_obstacles(self, dy, dx, sensor_data):
+        vx, vy = self.obstacle_engine.compute(
+            dx, dy, *(sensor_data[label] for label in self.SENSOR_LABELS))
+        if np.isnan(vx) or np.isnan(vy):
+            log(INFO, "Ошибка расчёта/работы: нет сработавших правил")
+            return 0.0, 0.0
+        return vx, vy
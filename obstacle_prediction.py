@@ -0,0 +1,260 @@
+"""Прогноз движения препятствий по истории показаний датчиков.
+
+Спутники из задачи вращаются вокруг цели, поэтому препятствие удобно
+описывать в полярных координатах относительно центра (цели): угол и
+радиус орбиты. Каждое срабатывание датчика вместе с одометрией даёт точку
+препятствия; точки связываются с треками, и по истории углов трека
+(кольцевой буфер фиксированного размера) оценивается угловая скорость.
+
+По прогнозу через HORIZON секунд показание датчика, который видит
+уходящее из его сектора препятствие, заменяется прогнозным зазором: такое
+препятствие перестаёт держать робот в ветке обхода, и робот проходит в
+промежуток, а не колеблется между движением вперёд и назад.
+
+Сравнение в симуляторе: python obstacle_prediction.py --episodes 200
+"""
+import argparse
+import math
+
+import numpy as np
+
+from navigation_core import NavigationCore
+from robot_geometry import ROBOT_RADIUS, SENSOR_DIRECTIONS
+
+# Полуширина сектора входа контроллера (рад): одиночный датчик - 20°, сдвоенный задний - 40°
+SENSOR_SECTORS = np.radians((20.0, 20.0, 20.0, 20.0, 20.0, 40.0, 40.0))
+# Те же константы списками: в цикле по датчикам скаляры NumPy заметно медленнее float
+_DIRECTIONS = SENSOR_DIRECTIONS.tolist()
+_SECTORS = SENSOR_SECTORS.tolist()
+_EMPTY = -1e9  # Время пустой ячейки истории: вне любого окна, но конечное
+
+
+def _wrap(angle):
+    """Угол в диапазон [-pi, pi)."""
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+class ObstacleTracker:
+    """Треки препятствий с оценкой угловой скорости вокруг центра орбит.
+
+    История углов - в массивах, выделенных при создании: на трек HISTORY
+    последних (время, угол); число треков ограничено MAX_TRACKS. Состояние
+    треков и показания такта - в списках фиксированной длины, update не
+    создаёт новых массивов.
+    """
+
+    MAX_TRACKS = 4  # Одновременно отслеживаемых препятствий
+    HISTORY = 32  # Отсчётов угла на трек
+    SAMPLE_INTERVAL = 0.1  # Не чаще одного отсчёта в трек за это время (с): история ~3 с
+    WINDOW = 3.0  # По скольким последним секундам истории оценивается угловая скорость
+    MIN_SPAN = 0.5  # Минимальный охват истории для оценки (с), по среднему времени отсчётов
+    TRACK_TTL = 3.0  # Трек без срабатываний дольше этого удаляется (с)
+    ANGLE_GATE = math.radians(45.0)  # Допуск связывания точки с треком по углу
+    RADIUS_GATE = 0.1  # и по радиусу орбиты (м)
+    DETECT_RANGE = 0.40  # Показания ближе - препятствие (дальность ИК-датчика ~0.41 м)
+    HORIZON = 0.5  # Горизонт прогноза (с)
+    MIN_OMEGA = 0.05  # Трек медленнее (рад/с) не прогнозируется вне лучей датчиков - неподвижен
+    # Ближе этого текущее показание используется как есть (м): показание, включающее
+    # ветку обхода, прогноз никогда не поднимает
+    SAFETY = NavigationCore.OBSTACLE_THRESHOLD
+
+    def __init__(self, limit=NavigationCore.SENSOR_LIMIT):
+        k, h = self.MAX_TRACKS, self.HISTORY
+        self.limit = limit
+        self.times = np.full((k, h), _EMPTY)
+        self.angles = np.zeros((k, h))  # Развёрнутый угол (без скачков через ±pi)
+        self.count = [0] * k  # Всего отсчётов трека; 0 - слот свободен
+        self.last = [-math.inf] * k  # Время последнего отсчёта
+        self.radius = [0.0] * k  # Радиус орбиты
+        self.omega = [0.0] * k  # Угловая скорость (рад/с)
+        self.valid = [False] * k  # Угловая скорость оценена
+        self._weights = np.empty(h)
+        self._dt = np.empty(h)
+        self._assoc = [-1] * 7  # Трек, к которому отнесено показание датчика на такте
+        self._predicted = [0.0] * 7
+        self._effective = [0.0] * 7
+        self.updates = 0  # Тактов с прогнозом
+        self.changed = 0  # Тактов, где прогноз изменил хотя бы одно показание
+
+    def reset(self):
+        for k in range(self.MAX_TRACKS):
+            self.count[k] = 0
+            self.last[k] = -math.inf
+            self.valid[k] = False
+
+    def _associate(self, t, angle, radius):
+        """Индекс трека для точки (angle, radius); без подходящего - новый трек.
+
+        Новый трек занимает свободный слот или вытесняет самый старый, но не
+        трек, к которому уже отнесено показание этого такта; если вытеснить
+        некого, возвращается -1.
+        """
+        assoc = self._assoc
+        best, best_error = -1, self.ANGLE_GATE
+        for k in range(self.MAX_TRACKS):
+            if not self.count[k]:
+                continue
+            expected = self.angles[k, (self.count[k] - 1) % self.HISTORY] + self.omega[k] * (t - self.last[k])
+            error = abs(_wrap(angle - expected))
+            if error < best_error and abs(radius - self.radius[k]) < self.RADIUS_GATE:
+                best, best_error = k, error
+        if best >= 0:
+            return best
+        k = -1
+        for j in range(self.MAX_TRACKS):
+            if j in assoc:
+                continue
+            if not self.count[j]:
+                k = j
+                break
+            if k < 0 or self.last[j] < self.last[k]:
+                k = j
+        if k < 0:
+            return -1
+        self.count[k] = 0
+        self.times[k] = _EMPTY
+        self.last[k] = -math.inf  # Первый отсчёт нового трека пишется сразу
+        self.valid[k] = False
+        self.omega[k] = 0.0
+        self.radius[k] = radius
+        return k
+
+    def _add(self, k, t, angle, radius):
+        h = self.HISTORY
+        n = self.count[k]
+        if n:
+            previous = float(self.angles[k, (n - 1) % h])
+            angle = previous + _wrap(angle - previous)
+            self.radius[k] += 0.3 * (radius - self.radius[k])
+        self.times[k, n % h] = t
+        self.angles[k, n % h] = angle
+        self.count[k] = n + 1
+        self.last[k] = t
+
+        # Угловая скорость - наклон прямой по отсчётам за WINDOW секунд (веса 0/1)
+        times, angles = self.times[k], self.angles[k]
+        weights = self._weights
+        np.greater_equal(times, t - self.WINDOW, out=weights)
+        total = weights.sum()
+        if total < 3:
+            return
+        mean_t = weights @ times / total
+        if t - mean_t < self.MIN_SPAN / 2:  # Отсчёты слишком плотно - наклон не определён
+            return
+        dt = self._dt
+        np.subtract(times, mean_t, out=dt)
+        dt *= weights
+        self.omega[k] = float(dt @ angles / (dt @ dt))  # Сумма dt равна нулю - среднее угла не нужно
+        self.valid[k] = True
+
+    def update(self, t, x, y, phi, center, sensors):
+        """Показания для контроллера с учётом прогноза.
+
+        (x, y, phi) - положение робота, center - центр орбит (цель) в той же
+        системе координат, sensors - 7 входов контроллера. Возвращает список
+        из 7 значений для calculate_velocity; список перезаписывается на
+        следующем такте.
+        """
+        cx, cy = center
+        count, last, valid, omega = self.count, self.last, self.valid, self.omega
+        assoc = self._assoc
+        for k in range(self.MAX_TRACKS):
+            if count[k] and last[k] < t - self.TRACK_TTL:
+                count[k] = 0
+        for i in range(7):
+            assoc[i] = -1
+        for i in range(7):
+            distance = sensors[i]
+            if distance >= self.DETECT_RANGE:
+                continue
+            reach = ROBOT_RADIUS + distance
+            direction = phi + _DIRECTIONS[i]
+            px = x + reach * math.cos(direction) - cx
+            py = y + reach * math.sin(direction) - cy
+            angle, radius = math.atan2(py, px), math.hypot(px, py)
+            k = self._associate(t, angle, radius)
+            if k < 0:
+                continue
+            if t - last[k] >= self.SAMPLE_INTERVAL:  # Несколько датчиков и тактов - один отсчёт
+                self._add(k, t, angle, radius)
+            assoc[i] = k
+
+        # Прогнозный зазор по секторам датчиков: ближайшее препятствие через HORIZON
+        predicted = self._predicted
+        for i in range(7):
+            predicted[i] = self.limit
+        for k in range(self.MAX_TRACKS):
+            if not (valid[k] and count[k]):
+                continue
+            if abs(omega[k]) < self.MIN_OMEGA and k not in assoc:
+                continue  # Трек, пропавший из лучей датчиков, продолжает движение по оценке скорости
+            angle = (float(self.angles[k, (count[k] - 1) % self.HISTORY])
+                     + omega[k] * (t - last[k] + self.HORIZON))
+            radius = self.radius[k]
+            rx = cx + radius * math.cos(angle) - x
+            ry = cy + radius * math.sin(angle) - y
+            bearing = math.atan2(ry, rx) - phi
+            gap = max(math.hypot(rx, ry) - ROBOT_RADIUS, 0.0)
+            for i in range(7):
+                if abs(_wrap(bearing - _DIRECTIONS[i])) <= _SECTORS[i] and gap < predicted[i]:
+                    predicted[i] = gap
+
+        # Показание препятствия с известной скоростью не ближе прогноза: уходящее из сектора
+        # перестаёт держать робот в обходе. Ближе SAFETY показание не трогаем. Обратное
+        # (min с прогнозом для приближающихся) в симуляторе давало ложные срабатывания
+        # и больше колебаний, поэтому приближение видно только по самим датчикам
+        effective = self._effective
+        changed = False
+        for i in range(7):
+            value = float(sensors[i])
+            k = assoc[i]
+            if k >= 0 and valid[k] and value >= self.SAFETY and predicted[i] > value:
+                value = predicted[i]
+                changed = True
+            effective[i] = value
+        self.updates += 1
+        if changed:
+            self.changed += 1
+        return effective
+
+    def report(self):
+        return (f"Прогноз препятствий: тактов {self.updates}, "
+                f"изменено показаний на {self.changed} тактах")
+
+
+def compare(episodes=200, seed=0, max_time=60.0):
+    """Эпизоды симулятора без прогноза и с ним на одних и тех же спутниках."""
+    import contextlib
+    import io
+
+    import main
+    import telemetry
+    from controller_cache import load_controller
+    from simulator import RobotinoWorld, Satellites, run_episode
+
+    telemetry.set_log_level('off')
+    nav = load_controller()
+    target = (main.POINT_X, main.POINT_Y)
+    for name, tracker in (('без прогноза', None), ('с прогнозом', ObstacleTracker())):
+        rng = np.random.default_rng(seed)
+        results = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(episodes):
+                if tracker is not None:
+                    tracker.reset()
+                world = RobotinoWorld(Satellites.random(target, rng))
+                results.append(run_episode(nav, world, target, max_velocity=main.MAX_VELOCITY,
+                                           max_time=max_time, tracker=tracker))
+        reached = [r for r in results if r['reached']]
+        print(f"{name}: успешно {sum(r['success'] for r in results)}/{episodes}, "
+              f"столкновений {sum(r['collisions'] for r in results)}, "
+              f"среднее время {np.mean([r['time'] for r in reached]) if reached else float('nan'):.1f} с, "
+              f"смен направления vx {np.mean([r['reversals'] for r in results]):.1f} на эпизод")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Прогноз движения препятствий")
+    parser.add_argument('--episodes', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    compare(args.episodes, args.seed)
@@ -0,0 +1,121 @@
+"""Замер времени этапов такта управления.
+
+Этапы отмечаются в горячем пути так:
+    with PROFILER.stage('compute'):
+        ...
+или PROFILER.add('tick', seconds) для уже измеренного интервала.
+Длительности копятся в кольцевых буферах фиксированного размера, отчёт -
+p50/p95/p99 и гистограмма по логарифмическим корзинам. Выключенный
+профилировщик (enabled = False) возвращает общий пустой контекст.
+"""
+import time
+
+import numpy as np
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class StageStats:
+    """Длительности одного этапа: последние capacity замеров."""
+
+    def __init__(self, name, capacity):
+        self.name = name
+        self.samples = np.zeros(capacity)
+        self.capacity = capacity
+        self.count = 0  # Всего замеров (позиция = count % capacity)
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.add(time.perf_counter() - self._start)
+        return False
+
+    def add(self, seconds):
+        self.samples[self.count % self.capacity] = seconds
+        self.count += 1
+
+    def values(self):
+        return self.samples[:min(self.count, self.capacity)]
+
+    def percentiles(self, q=(50, 95, 99)):
+        values = self.values()
+        if not len(values):
+            return [float('nan')] * len(q)
+        return list(np.percentile(values, q))
+
+
+class StageProfiler:
+    """Набор этапов по именам. Один этап замеряется в одном потоке."""
+
+    CAPACITY = 65536  # Замеров на этап (~20 мин при 50 Гц)
+    BINS = np.logspace(-6, 0, 25)  # Корзины гистограммы: от 1 мкс до 1 с
+
+    def __init__(self, enabled=True, capacity=None):
+        self.enabled = enabled
+        self.capacity = capacity or self.CAPACITY
+        self.stages = {}
+
+    def _get(self, name):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name, self.capacity)
+        return stats
+
+    def stage(self, name):
+        """Контекст замера этапа name."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._get(name)
+
+    def add(self, name, seconds):
+        if self.enabled:
+            self._get(name).add(seconds)
+
+    def reset(self):
+        self.stages.clear()
+
+    def summary(self):
+        """Словарь этап -> {'count', 'p50', 'p95', 'p99', 'max'} в секундах."""
+        result = {}
+        for name, stats in self.stages.items():
+            values = stats.values()
+            p50, p95, p99 = stats.percentiles()
+            result[name] = {'count': stats.count, 'p50': p50, 'p95': p95, 'p99': p99,
+                            'max': float(values.max()) if len(values) else float('nan')}
+        return result
+
+    def report(self):
+        """Строки отчёта: p50/p95/p99/макс по этапам, мс."""
+        lines = [f"{'этап':<16}{'замеров':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'макс':>9}  (мс)"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<16}{s['count']:>9}{s['p50'] * 1e3:>9.3f}{s['p95'] * 1e3:>9.3f}"
+                         f"{s['p99'] * 1e3:>9.3f}{s['max'] * 1e3:>9.3f}")
+        return lines
+
+    def histogram(self, name, width=40):
+        """Текстовая гистограмма длительностей этапа."""
+        values = self.stages[name].values()
+        counts, edges = np.histogram(values, bins=self.BINS)
+        peak = max(counts.max(), 1)
+        lines = [f"{name}:"]
+        for count, low, high in zip(counts, edges[:-1], edges[1:]):
+            if count:
+                lines.append(f"  {low * 1e3:>9.3f}-{high * 1e3:<9.3f} мс "
+                             f"{'#' * max(1, int(width * count / peak))} {count}")
+        return lines
+
+
+# Общий профилировщик цикла управления и контроллера
+PROFILER = StageProfiler(enabled=False)
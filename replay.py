@@ -0,0 +1,187 @@
+"""Воспроизведение записанной телеметрии через calculate_velocity.
+
+Запись (каталог TelemetryRecorder) читается порциями из np.memmap, поэтому
+многочасовая сессия не загружается в память целиком. Такты идут подряд без
+пауз; для каждого такта замеряется время calculate_velocity отдельно для
+ветки движения к цели (_move_to_target) и обхода (_avoid_obstacles).
+
+Сравнение двух вариантов контроллера:
+    python replay.py telemetry/20250101-120000 --a skfuzzy --b numpy
+Сравнение двух версий кода - каждый прогон в своей копии репозитория:
+    python replay.py REC --a numpy --save old.npz     (в старой версии)
+    python replay.py REC --a numpy --save new.npz     (в новой версии)
+    python replay.py --compare old.npz new.npz
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+import telemetry
+from telemetry import open_recording
+
+CHUNK = 4096  # Тактов, читаемых из memmap за раз
+TOLERANCE = 1e-6  # Расхождение скоростей, начиная с которого такт считается отличающимся (м/с)
+BRANCH_NAMES = ('goal', 'obstacle')  # Индексы = NavigationCore.BRANCH_GOAL / BRANCH_OBSTACLE
+
+
+def make_controller(spec, params=None):
+    """Контроллер по короткому имени: skfuzzy, numpy, compiled или cache.
+
+    Суффикс "+lru" включает кэш вывода по квантованным входам (enable_cache),
+    например numpy+lru.
+    """
+    spec, _, suffix = spec.partition('+')
+    if spec == 'cache':
+        from controller_cache import load_controller
+        nav = load_controller(params=params)
+    else:
+        from navigation import NavigationController
+        if spec == 'skfuzzy':
+            nav = NavigationController(params=params)
+        elif spec == 'numpy':
+            nav = NavigationController(backend='numpy', params=params)
+        elif spec == 'compiled':
+            nav = NavigationController(compiled=True, params=params)
+        else:
+            raise ValueError(f"Неизвестный контроллер: {spec}")
+    if suffix == 'lru':
+        nav.enable_cache()
+    elif suffix:
+        raise ValueError(f"Неизвестный суффикс: {suffix}")
+    return nav
+
+
+def replay(recording, nav, limit=None, max_velocity=None):
+    """Прогон записи через nav.calculate_velocity.
+
+    max_velocity - ограничение уставок, как MAX_VELOCITY в цикле управления
+    (записанные vx/vy уже ограничены). Возвращает словарь массивов по тактам:
+    vx, vy, branch и seconds - время вызова calculate_velocity.
+    """
+    count = len(recording['time']) if limit is None else min(limit, len(recording['time']))
+    vx = np.empty(count)
+    vy = np.empty(count)
+    branch = np.empty(count, dtype=np.uint8)
+    seconds = np.empty(count)
+
+    level = telemetry.log_level
+    telemetry.set_log_level('off')  # печать каждого такта исказила бы замер
+    try:
+        for start in range(0, count, CHUNK):
+            stop = min(start + CHUNK, count)
+            # Порция из memmap в списки Python - без накладных расходов скаляров NumPy
+            dx = recording['dx'][start:stop].tolist()
+            dy = recording['dy'][start:stop].tolist()
+            sensors = recording['sensors'][start:stop].tolist()
+            for k in range(stop - start):
+                i = start + k
+                begin = time.perf_counter()
+                vx[i], vy[i] = nav.calculate_velocity(dx[k], dy[k], *sensors[k])
+                seconds[i] = time.perf_counter() - begin
+                branch[i] = nav.last_branch
+    finally:
+        telemetry.log_level = level
+    if max_velocity is not None:
+        np.clip(vx, -max_velocity, max_velocity, out=vx)
+        np.clip(vy, -max_velocity, max_velocity, out=vy)
+    return {'vx': vx, 'vy': vy, 'branch': branch, 'seconds': seconds}
+
+
+def timing_report(result):
+    """Строки со временем такта по веткам: среднее, p50, p99, максимум."""
+    lines = []
+    for code, name in enumerate(BRANCH_NAMES):
+        seconds = result['seconds'][result['branch'] == code] * 1e3
+        if not len(seconds):
+            lines.append(f"{name}: 0 тактов")
+            continue
+        p50, p99 = np.percentile(seconds, [50, 99])
+        lines.append(f"{name}: {len(seconds)} тактов, среднее {seconds.mean():.3f} мс, "
+                     f"p50 {p50:.3f} мс, p99 {p99:.3f} мс, макс {seconds.max():.3f} мс")
+    return lines
+
+
+def diff(a, b, tolerance=TOLERANCE):
+    """Сравнение скоростей двух прогонов одной записи."""
+    dvx = np.abs(a['vx'] - b['vx'])
+    dvy = np.abs(a['vy'] - b['vy'])
+    worst = np.maximum(dvx, dvy)
+    differs = np.flatnonzero(worst > tolerance)
+    return {
+        'ticks': len(worst),
+        'differ': len(differs),
+        'first': int(differs[0]) if len(differs) else None,
+        'max_dvx': float(dvx.max()) if len(dvx) else 0.0,
+        'max_dvy': float(dvy.max()) if len(dvy) else 0.0,
+        'branch_changed': int((a['branch'] != b['branch']).sum()),
+        'indices': differs,
+    }
+
+
+def diff_report(d):
+    lines = [f"Тактов: {d['ticks']}, отличаются: {d['differ']} "
+             f"(первый: {d['first']}), смена ветки: {d['branch_changed']}",
+             f"Макс. |dvx| = {d['max_dvx']:.6f} м/с, макс. |dvy| = {d['max_dvy']:.6f} м/с"]
+    return lines
+
+
+def save_result(result, path):
+    np.savez(path, **result)
+
+
+def load_result(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Воспроизведение записи телеметрии")
+    parser.add_argument('recording', nargs='?')
+    parser.add_argument('--a', default='numpy', help="skfuzzy, numpy, compiled или cache (+lru - с кэшем вывода)")
+    parser.add_argument('--b', default=None, help="второй контроллер для сравнения")
+    parser.add_argument('--params-a', default=None, help="JSON с params для --a")
+    parser.add_argument('--params-b', default=None, help="JSON с params для --b")
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--max-velocity', type=float, default=0.1, help="как MAX_VELOCITY в main.py")
+    parser.add_argument('--save', default=None, help="сохранить скорости прогона --a в .npz")
+    parser.add_argument('--compare', nargs=2, metavar=('A', 'B'), help="сравнить два .npz")
+    parser.add_argument('--diff-csv', default=None, help="такты с расхождением в CSV")
+    args = parser.parse_args()
+
+    if args.compare:
+        result_a, result_b = (load_result(path) for path in args.compare)
+    else:
+        recording = open_recording(args.recording)
+        print(f"Запись: {len(recording['time'])} тактов")
+        nav_a = make_controller(args.a, json.loads(args.params_a) if args.params_a else None)
+        start = time.perf_counter()
+        result_a = replay(recording, nav_a, args.limit, args.max_velocity)
+        elapsed = time.perf_counter() - start
+        print(f"[{args.a}] {len(result_a['vx'])} тактов за {elapsed:.2f} с")
+        for line in timing_report(result_a) + nav_a.cache_report():
+            print("  " + line)
+        if args.save:
+            save_result(result_a, args.save)
+
+        # Без второго контроллера сравниваем с уставками из записи
+        if args.b:
+            nav_b = make_controller(args.b, json.loads(args.params_b) if args.params_b else None)
+            result_b = replay(recording, nav_b, args.limit, args.max_velocity)
+            print(f"[{args.b}]")
+            for line in timing_report(result_b) + nav_b.cache_report():
+                print("  " + line)
+        else:
+            n = len(result_a['vx'])
+            result_b = {name: np.asarray(recording[name][:n]) for name in ('vx', 'vy', 'branch')}
+            print("[запись]")
+
+    d = diff(result_a, result_b)
+    for line in diff_report(d):
+        print(line)
+    if args.diff_csv:
+        idx = d['indices']
+        np.savetxt(args.diff_csv, np.column_stack([
+            idx, result_a['vx'][idx], result_b['vx'][idx], result_a['vy'][idx], result_b['vy'][idx],
+        ]), delimiter=',', header='tick,vx_a,vx_b,vy_a,vy_b', comments='', fmt=['%d'] + ['%.6f'] * 4)
@@ -0,0 +1,96 @@
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class LatencyStats:
+    """Накопленная статистика задержек одного эндпоинта."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def __str__(self):
+        if not self.count:
+            return f"нет запросов (ошибок: {self.errors})"
+        return (f"{self.count} запр., среднее {self.mean * 1e3:.2f} мс, "
+                f"мин {self.min * 1e3:.2f} мс, макс {self.max * 1e3:.2f} мс, "
+                f"ошибок {self.errors}")
+
+
+class RobotClient:
+    """HTTP-клиент REST API Robotino с постоянным (keep-alive) соединением.
+
+    Все запросы идут через одну requests.Session: TCP-соединение
+    устанавливается один раз и переиспользуется на каждом такте.
+    """
+
+    ENDPOINTS = ('odometry', 'distancesensorarray', 'omnidrive')
+    TIMEOUT = (0.5, 0.1)  # (подключение, чтение), с - такт 20 мс не ждёт дольше
+    RETRIES = 1  # Повтор при обрыве соединения (робот мог закрыть keep-alive)
+
+    def __init__(self, ip, port=80, timeout=None, retries=None):
+        self.base_url = f"http://{ip}:{port}/data/"
+        self.timeout = self.TIMEOUT if timeout is None else timeout
+        retries = self.RETRIES if retries is None else retries
+
+        # Повторяем только ошибки соединения/чтения, не HTTP-статусы.
+        # POST omnidrive идемпотентен (задаёт уставку), поэтому его тоже можно повторить
+        retry = Retry(total=retries, connect=retries, read=retries, status=0,
+                      backoff_factor=0, allowed_methods=frozenset({'GET', 'POST'}))
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4,
+                                                  max_retries=retry))
+        self.latency = {name: LatencyStats() for name in self.ENDPOINTS}
+
+    def _request(self, method, endpoint, **kwargs):
+        stats = self.latency[endpoint]
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + endpoint,
+                                            timeout=self.timeout, **kwargs)
+        except Exception:
+            stats.errors += 1
+            raise
+        stats.add(time.perf_counter() - start)
+        return response
+
+    def get(self, endpoint):
+        """GET /data/<endpoint>."""
+        return self._request('GET', endpoint)
+
+    def post(self, endpoint, payload):
+        """POST /data/<endpoint> с телом JSON."""
+        return self._request('POST', endpoint, json=payload)
+
+    def connect(self):
+        """Проверка связи и открытие keep-alive соединения."""
+        try:
+            return self.get('odometry').status_code == 200
+        except Exception as error:
+            print(f"Ошибка подключения: {error}")
+            return False
+
+    def report(self):
+        """Строки со статистикой задержек по эндпоинтам."""
+        return [f"{name}: {stats}" for name, stats in self.latency.items()]
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,15 @@
+"""Геометрия Robotino: корпус и расположение ИК-датчиков.
+
+Общие константы для симулятора, карты миссии и прогноза препятствий.
+"""
+import numpy as np
+
+ROBOT_RADIUS = 0.185  # Радиус корпуса Robotino (м)
+SENSOR_RANGE = 0.41  # Дальность ИК-датчика (м), чуть меньше SENSOR_LIMIT
+SENSOR_ANGLES = np.radians(np.arange(9) * 40.0)  # Датчик 0 смотрит вперёд, далее против часовой
+
+# Порядок группировки 9 датчиков в 7 входов, как в main.group_proximity_sensors
+SENSOR_GROUPS = ((1,), (2,), (0,), (8,), (7,), (3, 4), (6, 5))
+# Направления 7 входов контроллера (рад, 0 - вперёд, против часовой), для
+# сдвоенных датчиков - середина между ними
+SENSOR_DIRECTIONS = np.radians((40.0, 80.0, 0.0, 320.0, 280.0, 140.0, 220.0))
@@ -0,0 +1,102 @@
+"""Потоковая фильтрация показаний датчиков расстояния.
+
+Каждая ступень - генератор-сопрограмма: принимает отсчёт (массив из 7
+значений) через send() и отдаёт отфильтрованный. Состояние ступени -
+массивы фиксированного размера, так что память не растёт со временем.
+SensorFilter связывает ступени в цепочку; wrap() встраивает её между
+функцией опроса (read_proximity_sensors) и циклом управления.
+"""
+import numpy as np
+
+from navigation_core import NavigationCore
+
+SENSOR_LIMIT = NavigationCore.SENSOR_LIMIT
+
+
+def clamp(low=0.0, high=SENSOR_LIMIT):
+    """Ограничение диапазона: значения вне [low, high] прижимаются к границам."""
+    sample = yield
+    out = np.empty(len(sample))
+    while True:
+        np.clip(sample, low, high, out=out)
+        sample = yield out
+
+
+def rate_gate(max_step, confirm=2):
+    """Отсев выбросов по скорости изменения.
+
+    Скачок больше max_step за отсчёт заменяется предыдущим значением.
+    Если новое значение держится confirm отсчётов подряд (в пределах
+    max_step от первого скачка), оно принимается - реальное препятствие
+    не теряется, а одиночный выброс не доходит до _has_obstacles.
+    """
+    sample = yield
+    held = np.array(sample, dtype=float)    # Последнее принятое значение
+    pending = held.copy()                   # Скачок, ожидающий подтверждения
+    count = np.zeros(len(held), dtype=int)  # Сколько отсчётов подряд держится скачок
+    while True:
+        sample = yield held
+        jump = np.abs(sample - held) > max_step
+        if not jump.any():
+            held[:] = sample
+            count[:] = 0
+            continue
+        # Повтор скачка рядом с ожидающим значением продлевает его, иначе отсчёт заново
+        repeat = jump & (count > 0) & (np.abs(sample - pending) <= max_step)
+        count[:] = np.where(repeat, count + 1, jump)
+        np.copyto(pending, sample, where=jump & ~repeat)
+        accept = count >= confirm
+        accept |= ~jump
+        np.copyto(held, sample, where=accept)
+        count[accept] = 0
+
+
+def median(window=3):
+    """Скользящая медиана по последним window отсчётам."""
+    sample = yield
+    buffer = np.empty((window, len(sample)))
+    n = 0
+    while True:
+        buffer[n % window] = sample
+        n += 1
+        filled = buffer if n >= window else buffer[:n]
+        # Нечётное окно - средний элемент; для неполного окна медиана честная
+        out = np.sort(filled, axis=0)[len(filled) // 2] if len(filled) % 2 else np.median(filled, axis=0)
+        sample = yield out
+
+
+def ema(alpha=0.5):
+    """Экспоненциальное сглаживание: out = alpha * x + (1 - alpha) * out."""
+    sample = yield
+    out = np.array(sample, dtype=float)
+    while True:
+        sample = yield out
+        out *= 1 - alpha
+        out += alpha * sample
+
+
+class SensorFilter:
+    """Цепочка ступеней-генераторов, применяемая к каждому отсчёту по очереди."""
+
+    def __init__(self, *stages):
+        self.stages = stages
+        for stage in stages:
+            next(stage)  # Запуск генератора: первый send() передаёт первый отсчёт
+
+    @classmethod
+    def default(cls):
+        """Ограничение диапазона, отсев одиночных выбросов, медиана по 3 отсчётам."""
+        return cls(clamp(), rate_gate(max_step=0.1), median(3))
+
+    def __call__(self, sample):
+        value = np.asarray(sample, dtype=float)
+        for stage in self.stages:
+            value = stage.send(value)
+        return tuple(value.tolist())
+
+    def wrap(self, fetch):
+        """Функция опроса с фильтрацией; None от fetch проходит без изменений."""
+        def filtered():
+            sample = fetch()
+            return None if sample is None else self(sample)
+        return filtered
@@ -0,0 +1,330 @@
+"""Локальный симулятор Robotino для прогонов без робота.
+
+Отдаёт те же эндпоинты REST API, что и робот:
+/data/odometry, /data/distancesensorarray (9 датчиков) и /data/omnidrive.
+Внутри - кинематика всенаправленной платформы, лучевые ИК-датчики и
+"спутники", вращающиеся по орбитам вокруг цели (задача из README).
+
+Запуск:
+  python simulator.py --serve --port 8080      # только HTTP-сервер
+  python simulator.py --time-scale 4           # main_control_loop через HTTP
+  python simulator.py --episodes 1000          # быстрые прогоны без HTTP (CI)
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from robot_geometry import ROBOT_RADIUS, SENSOR_ANGLES, SENSOR_GROUPS, SENSOR_RANGE
+
+COMMAND_TIMEOUT = 0.5  # Без новых уставок дольше этого робот останавливается (с)
+SIM_STEP = 0.005  # Шаг интегрирования (с)
+
+
+def group_sensors(raw):
+    """9 показаний (..., 9) -> 7 входов контроллера (..., 7)."""
+    raw = np.asarray(raw, dtype=float)
+    return np.stack([raw[..., list(g)].min(axis=-1) for g in SENSOR_GROUPS], axis=-1)
+
+
+def raycast(origins, directions, centers, radii, max_range=SENSOR_RANGE):
+    """Расстояние вдоль лучей до ближайшей окружности.
+
+    origins, directions: (..., S, 2); centers: (..., M, 2); radii: (..., M).
+    Возвращает (..., S), не больше max_range.
+    """
+    oc = origins[..., :, np.newaxis, :] - centers[..., np.newaxis, :, :]  # (..., S, M, 2)
+    b = np.einsum('...sd,...smd->...sm', directions, oc)
+    c = np.einsum('...smd,...smd->...sm', oc, oc) - radii[..., np.newaxis, :] ** 2
+    disc = b * b - c
+    t = -b - np.sqrt(np.maximum(disc, 0.0))
+    hit = (disc >= 0) & (t >= 0)
+    t = np.where(c < 0, 0.0, np.where(hit, t, np.inf))  # Датчик внутри препятствия - 0
+    if t.shape[-1] == 0:
+        return np.full(t.shape[:-1], max_range)
+    return np.minimum(t.min(axis=-1), max_range)
+
+
+class Satellites:
+    """Препятствия на круговых орбитах вокруг цели."""
+
+    def __init__(self, center, orbit_radius, angular_speed, phase, radius):
+        self.center = np.asarray(center, dtype=float)
+        self.orbit_radius = np.asarray(orbit_radius, dtype=float)
+        self.angular_speed = np.asarray(angular_speed, dtype=float)
+        self.phase = np.asarray(phase, dtype=float)
+        self.radius = np.asarray(radius, dtype=float)
+
+    @classmethod
+    def random(cls, center, rng, count=3):
+        return cls(center,
+                   orbit_radius=rng.uniform(0.35, 0.45, count),
+                   angular_speed=rng.uniform(0.15, 0.4, count) * rng.choice([-1, 1], count),
+                   phase=rng.uniform(0, 2 * np.pi, count),
+                   radius=rng.uniform(0.03, 0.06, count))
+
+    def positions(self, t):
+        angle = self.phase + self.angular_speed * t
+        return self.center + self.orbit_radius[:, np.newaxis] * np.column_stack(
+            [np.cos(angle), np.sin(angle)])
+
+
+class RobotinoWorld:
+    """Состояние симуляции: поза робота, уставки, спутники, время.
+
+    Координаты мира совпадают с одометрией: робот стартует в (0, 0, 0).
+    """
+
+    def __init__(self, satellites=None, start=(0.0, 0.0, 0.0)):
+        self.pose = np.array(start, dtype=float)  # x, y, phi
+        self.command = np.zeros(3)  # vx, vy, omega в системе робота
+        self.velocity = np.zeros(3)
+        self.satellites = satellites
+        self.time = 0.0
+        self.command_time = -COMMAND_TIMEOUT
+        self.seq = 0
+        self.collisions = 0
+        self.min_clearance = float('inf')
+        self._in_contact = False
+
+    def set_command(self, vx, vy, omega):
+        self.command = np.array([vx, vy, omega], dtype=float)
+        self.command_time = self.time
+
+    def advance(self, duration):
+        """Интегрирование кинематики на duration секунд фиксированным шагом."""
+        steps = max(int(round(duration / SIM_STEP)), 1)
+        dt = duration / steps
+        for _ in range(steps):
+            self._step(dt)
+
+    def advance_to(self, sim_time):
+        if sim_time > self.time:
+            self.advance(sim_time - self.time)
+
+    def _step(self, dt):
+        if self.time - self.command_time > COMMAND_TIMEOUT:
+            self.command[:] = 0.0  # Как и настоящий робот: без уставок - стоп
+        self.velocity = self.command.copy()
+        vx, vy, omega = self.velocity
+        phi = self.pose[2]
+        cos, sin = math.cos(phi), math.sin(phi)
+        self.pose += dt * np.array([cos * vx - sin * vy, sin * vx + cos * vy, omega])
+        self.time += dt
+        self.seq += 1
+        self._check_clearance()
+
+    def _check_clearance(self):
+        if self.satellites is None:
+            return
+        gaps = (np.hypot(*(self.satellites.positions(self.time) - self.pose[:2]).T)
+                - ROBOT_RADIUS - self.satellites.radius)
+        clearance = float(gaps.min()) if len(gaps) else float('inf')
+        if clearance < 0 and not self._in_contact:
+            self.collisions += 1
+        self._in_contact = clearance < 0
+        self.min_clearance = min(self.min_clearance, clearance)
+
+    def odometry(self):
+        """[x, y, phi, vx, vy, omega, seq] - формат /data/odometry."""
+        return [*map(float, self.pose), *map(float, self.velocity), self.seq]
+
+    def distance_sensors(self):
+        """9 показаний ИК-датчиков (м) - формат /data/distancesensorarray."""
+        angles = self.pose[2] + SENSOR_ANGLES
+        directions = np.column_stack([np.cos(angles), np.sin(angles)])
+        origins = self.pose[:2] + ROBOT_RADIUS * directions
+        if self.satellites is None:
+            return [SENSOR_RANGE] * len(SENSOR_ANGLES)
+        return raycast(origins, directions, self.satellites.positions(self.time),
+                       self.satellites.radius).tolist()
+
+
+class SimulatorServer:
+    """HTTP-двойник робота поверх RobotinoWorld.
+
+    Время симуляции идёт в time_scale раз быстрее настенного и
+    досчитывается лениво при каждом запросе. С заданным step время не
+    зависит от настенного: каждый запрос одометрии продвигает мир ровно на
+    step секунд (один такт опроса), и траектория не меняется от загрузки
+    машины и задержек HTTP.
+    """
+
+    def __init__(self, world, host='127.0.0.1', port=0, time_scale=1.0, step=None):
+        self.world = world
+        self.time_scale = time_scale
+        self.step = step
+        self.lock = threading.Lock()
+        self._start = time.monotonic()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def _sync(self):
+        if self.step is not None:
+            return
+        self.world.advance_to((time.monotonic() - self._start) * self.time_scale)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, как у RobotClient
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                # Заголовки и тело одной записью - иначе Nagle + delayed ACK дают ~40 мс
+                self.wfile.write(
+                    f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+
+            def do_GET(self):
+                with server.lock:
+                    server._sync()
+                    if self.path == '/data/odometry':
+                        if server.step is not None:
+                            server.world.advance(server.step)
+                        return self._reply(200, server.world.odometry())
+                    if self.path == '/data/distancesensorarray':
+                        return self._reply(200, server.world.distance_sensors())
+                self._reply(404, {})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path != '/data/omnidrive':
+                    return self._reply(404, {})
+                vx, vy, omega = json.loads(body)
+                with server.lock:
+                    server._sync()
+                    server.world.set_command(vx, vy, omega)
+                self._reply(200, {})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def run_episode(nav, world, target, tolerance=0.02, max_velocity=0.1,
+                period=0.02, max_time=60.0, tracker=None, shaper=None):
+    """Замкнутый прогон без HTTP: логика такта как в main_control_loop.
+
+    tracker - obstacle_prediction.ObstacleTracker: показания датчиков
+    заменяются прогнозными, как при OBSTACLE_PREDICTION в main.
+    shaper - command_shaper.CommandShaper с отправкой в world.set_command:
+    уставки проходят через него, как в main.
+    Возвращает словарь с успехом, временем до цели, минимальным зазором
+    до спутников, числом столкновений и смен знака vx (колебания).
+    """
+    reversals = 0
+    last_vx = 0.0
+    while world.time < max_time:
+        x, y, phi = world.pose
+        dx, dy = target[0] - x, target[1] - y
+        if math.hypot(dx, dy) <= tolerance:
+            if shaper is not None:
+                shaper.stop(world.time)
+            else:
+                world.set_command(0, 0, 0)
+            return {'success': world.collisions == 0, 'reached': True,
+                    'time': world.time, 'min_clearance': world.min_clearance,
+                    'collisions': world.collisions, 'reversals': reversals}
+        sensors = group_sensors(world.distance_sensors())
+        if tracker is not None:
+            sensors = tracker.update(world.time, x, y, phi, target, sensors)
+        vx, vy = nav.calculate_velocity(dx, dy, *sensors)
+        vx = max(min(vx, max_velocity), -max_velocity)
+        vy = max(min(vy, max_velocity), -max_velocity)
+        if vx * last_vx < 0:
+            reversals += 1
+        if vx:
+            last_vx = vx
+        if shaper is not None:
+            shaper(world.time, vx, vy, 0)
+        else:
+            world.set_command(vx, vy, 0)
+        world.advance(period)
+    return {'success': False, 'reached': False, 'time': world.time,
+            'min_clearance': world.min_clearance, 'collisions': world.collisions,
+            'reversals': reversals}
+
+
+def run_episodes(count, seed=0, **kwargs):
+    """count случайных эпизодов с целью в (POINT_X, POINT_Y) из main."""
+    import main
+    from navigation import NavigationController
+
+    nav = NavigationController(backend='numpy')
+    target = (main.POINT_X, main.POINT_Y)
+    rng = np.random.default_rng(seed)
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):  # отладочные print контроллера
+        for _ in range(count):
+            world = RobotinoWorld(Satellites.random(target, rng))
+            results.append(run_episode(nav, world, target,
+                                       max_velocity=main.MAX_VELOCITY, **kwargs))
+    return results
+
+
+def run_closed_loop(time_scale):
+    """main_control_loop через HTTP против локального симулятора."""
+    import main
+    from robot_client import RobotClient
+
+    rng = np.random.default_rng(0)
+    world = RobotinoWorld(Satellites.random((main.POINT_X, main.POINT_Y), rng))
+    server = SimulatorServer(world, time_scale=time_scale).start()
+    main.robot = RobotClient('127.0.0.1', server.port)
+    try:
+        main.main_control_loop()
+    finally:
+        server.stop()
+    print(f"Время симуляции {world.time:.1f} с, мин. зазор {world.min_clearance:.3f} м, "
+          f"столкновений {world.collisions}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Симулятор Robotino")
+    parser.add_argument('--serve', action='store_true', help="только HTTP-сервер")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--time-scale', type=float, default=1.0)
+    parser.add_argument('--episodes', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.episodes:
+        start = time.perf_counter()
+        results = run_episodes(args.episodes, seed=args.seed)
+        elapsed = time.perf_counter() - start
+        reached = [r for r in results if r['reached']]
+        print(f"Эпизодов: {len(results)} за {elapsed:.1f} с, "
+              f"успешно: {sum(r['success'] for r in results)}, дошли: {len(reached)}, "
+              f"среднее время до цели: {np.mean([r['time'] for r in reached]) if reached else float('nan'):.1f} с, "
+              f"мин. зазор: {min(r['min_clearance'] for r in results):.3f} м")
+    elif args.serve:
+        rng = np.random.default_rng(args.seed)
+        world = RobotinoWorld(Satellites.random((0.5, 0.5), rng))
+        server = SimulatorServer(world, port=args.port, time_scale=args.time_scale)
+        print(f"Симулятор Robotino: http://127.0.0.1:{server.port}/data/")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
+    else:
+        run_closed_loop(args.time_scale)
@@ -0,0 +1,153 @@
+"""Подбор настроечных констант контроллера на пакетном симуляторе.
+
+Каждый кандидат - набор NavigationController.TUNABLE и max_velocity -
+оценивается в отдельном процессе на одних и тех же сценариях
+BatchSimulator. Результаты дописываются в JSONL-файл по мере готовности,
+поэтому прерванный подбор продолжается с того же места. Каждая запись
+хранит условия прогона (episodes, seed, max_time): результаты с другими
+условиями при продолжении не используются.
+
+Запуск: python sweep.py --episodes 200 --workers 8
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Сетка по умолчанию: значения из исходного кода плюс соседние
+GRID = {
+    'OBSTACLE_THRESHOLD': [0.20, 0.25, 0.30],
+    'DANGER_DISTANCE': [(0.14, 0.17), (0.17, 0.20), (0.20, 0.23)],
+    'VELOCITY_SCALE': [0.7, 1.0],
+    'max_velocity': [0.1, 0.15],
+}
+
+COLUMNS = ('success_rate', 'reach_rate', 'collision_rate', 'mean_time', 'mean_min_clearance')
+
+
+def candidates(grid):
+    """Все сочетания значений сетки в виде словарей."""
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def candidate_key(candidate):
+    """Ключ кандидата для контрольной точки (кортежи и списки не различаются)."""
+    return json.dumps(candidate, sort_keys=True)
+
+
+def evaluate(candidate, episodes, seed, max_time):
+    """Оценка одного кандидата; выполняется в процессе-воркере."""
+    from batch_sim import BatchSimulator, summarize
+    from controller_cache import load_controller
+
+    params = {k: v for k, v in candidate.items() if k != 'max_velocity'}
+    nav = load_controller(params=params)
+    sim = BatchSimulator.random(nav, episodes, seed=seed)
+    start = time.perf_counter()
+    result = sim.run(max_time=max_time, max_velocity=candidate['max_velocity'])
+    stats = summarize(result)
+    stats['elapsed'] = time.perf_counter() - start
+    return stats
+
+
+def load_checkpoint(path, config):
+    """Готовые результаты из JSONL для условий config.
+
+    Недописанная последняя строка пропускается; записи с другими условиями
+    прогона (или без них) не используются - кандидат оценивается заново.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    mismatched = 0
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('config') != config:
+                mismatched += 1
+                continue
+            done[candidate_key(record['candidate'])] = record
+    if mismatched:
+        print(f"Пропущено записей с другими условиями прогона: {mismatched} (нужны {config})")
+    return done
+
+
+def rank(records):
+    """Сортировка: больше успехов, меньше столкновений, быстрее до цели."""
+    def key(record):
+        stats = record['stats']
+        mean_time = stats['mean_time']
+        return (-stats['success_rate'], stats['collision_rate'],
+                mean_time if mean_time == mean_time else float('inf'))
+    return sorted(records, key=key)
+
+
+def write_table(records, path, names):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['rank', *names, *COLUMNS])
+        for i, record in enumerate(rank(records), 1):
+            candidate, stats = record['candidate'], record['stats']
+            writer.writerow([i, *(candidate[n] for n in names),
+                             *(f"{stats[c]:.4f}" for c in COLUMNS)])
+
+
+def run_sweep(grid=GRID, episodes=200, seed=0, max_time=30.0, workers=None,
+              checkpoint='sweep_results.jsonl', table='sweep_ranked.csv'):
+    """Подбор по сетке с продолжением по контрольной точке; возвращает отсортированные записи."""
+    config = {'episodes': episodes, 'seed': seed, 'max_time': max_time}
+    done = load_checkpoint(checkpoint, config)
+    todo = [c for c in candidates(grid) if candidate_key(c) not in done]
+    print(f"Кандидатов: {len(todo) + len(done)}, уже оценено: {len(done)}")
+
+    with open(checkpoint, 'a', encoding='utf-8') as log, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(evaluate, c, episodes, seed, max_time): c for c in todo}
+        for future in as_completed(futures):
+            candidate = futures[future]
+            try:
+                stats = future.result()
+            except Exception as error:
+                print(f"Сбой кандидата {candidate}: {error}")
+                continue
+            record = {'candidate': json.loads(candidate_key(candidate)), 'config': config, 'stats': stats}
+            # Строка на диске сразу: после сбоя кандидат не пересчитывается
+            log.write(json.dumps(record) + '\n')
+            log.flush()
+            os.fsync(log.fileno())
+            done[candidate_key(candidate)] = record
+            print(f"[{len(done)}] {candidate}: успех {stats['success_rate']:.1%}, "
+                  f"столкновения {stats['collision_rate']:.1%} ({stats['elapsed']:.1f} с)")
+
+    keys = [candidate_key(c) for c in candidates(grid)]
+    records = rank(done[k] for k in keys if k in done)
+    write_table(records, table, list(grid))
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Подбор параметров контроллера")
+    parser.add_argument('--episodes', type=int, default=200)
+    parser.add_argument('--max-time', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', default='sweep_results.jsonl')
+    parser.add_argument('--out', default='sweep_ranked.csv')
+    args = parser.parse_args()
+
+    records = run_sweep(episodes=args.episodes, seed=args.seed, max_time=args.max_time,
+                        workers=args.workers, checkpoint=args.checkpoint, table=args.out)
+    if not records:
+        print("Нет успешно оценённых кандидатов")
+    else:
+        best = records[0]
+        print(f"Лучший: {best['candidate']}, успех {best['stats']['success_rate']:.1%}")
+        print(f"Таблица: {args.out}")
@@ -0,0 +1,167 @@
+"""Телеметрия такта управления и уровень отладочной печати.
+
+TelemetryRecorder пишет каждый такт в заранее выделенный массив записей.
+Заполненный блок передаётся фоновому потоку, который дописывает каждое поле
+в свой файл (<каталог>/<поле>.bin) - колонки читаются по отдельности через
+np.memmap без загрузки всей записи (см. open_recording). Схема колонок
+(meta.json) пишется при создании записи, а число тактов определяется по
+размерам файлов, поэтому открывается и запись прерванного сеанса.
+
+Печать в горячем пути управляется log_level: DEBUG - данные каждого такта
+(как раньше), INFO - только ошибки и события, OFF - ничего.
+"""
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+OFF, INFO, DEBUG = 0, 1, 2
+LEVELS = {'off': OFF, 'info': INFO, 'debug': DEBUG}
+log_level = DEBUG
+
+
+def set_log_level(name):
+    global log_level
+    if name not in LEVELS:
+        raise ValueError(f"Неизвестный уровень печати: {name}")
+    log_level = LEVELS[name]
+
+
+def log(level, message):
+    """Печать сообщения, если уровень включён.
+
+    В горячем пути сообщение формируется только после проверки:
+    if telemetry.log_level >= telemetry.DEBUG: print(...)
+    """
+    if log_level >= level:
+        print(message)
+
+
+# Запись одного такта; branch - NavigationCore.BRANCH_GOAL / BRANCH_OBSTACLE
+RECORD = np.dtype([
+    ('time', 'f8'),
+    ('odometry', 'f8', (7,)),
+    ('sensors', 'f8', (7,)),
+    ('dx', 'f8'),
+    ('dy', 'f8'),
+    ('branch', 'u1'),
+    ('vx', 'f8'),
+    ('vy', 'f8'),
+])
+
+
+class TelemetryRecorder:
+    """Запись тактов в колоночный бинарный формат.
+
+    Память под блоки выделяется один раз; record() только копирует числа
+    в текущий блок. Если фоновый поток не успевает и свободных блоков нет,
+    такты отбрасываются (счётчик dropped), а цикл управления не ждёт диск.
+    """
+
+    BLOCK = 1024  # Тактов в блоке (~20 с при 50 Гц)
+    BLOCKS = 4    # Блоков в обороте между циклом и потоком записи
+
+    def __init__(self, path, block=None, blocks=None):
+        self.path = path
+        block = block or self.BLOCK
+        os.makedirs(path, exist_ok=True)
+        self._free = queue.Queue()
+        for _ in range(blocks or self.BLOCKS):
+            self._free.put(np.zeros(block, dtype=RECORD))
+        self._full = queue.Queue()
+        self._block = self._free.get()
+        self._fill = 0
+        self.count = 0    # Записано на диск
+        self.dropped = 0  # Отброшено из-за нехватки блоков
+        self._files = {name: open(os.path.join(path, name + '.bin'), 'wb')
+                       for name in RECORD.names}
+        self._write_meta()  # Схема на диске сразу: запись читается и после аварийного завершения
+        self._writer = threading.Thread(target=self._write_loop, name="telemetry", daemon=True)
+        self._writer.start()
+
+    def record(self, timestamp, odometry, sensors, dx, dy, branch, vx, vy):
+        block = self._block
+        if block is None:
+            # Все блоки ждут записи - такт теряется, но цикл не блокируется
+            try:
+                block = self._block = self._free.get_nowait()
+            except queue.Empty:
+                self.dropped += 1
+                return
+        # Одно присваивание кортежа в 3-4 раза быстрее записи по полям
+        block[self._fill] = (timestamp, odometry, sensors, dx, dy, branch, vx, vy)
+        self._fill += 1
+        if self._fill == len(block):
+            self._hand_off()
+
+    def _hand_off(self):
+        self._full.put((self._block, self._fill))
+        self._fill = 0
+        try:
+            self._block = self._free.get_nowait()
+        except queue.Empty:
+            self._block = None
+
+    def _write_loop(self):
+        while True:
+            item = self._full.get()
+            if item is None:
+                break
+            block, fill = item
+            for name, f in self._files.items():
+                block[name][:fill].tofile(f)
+            self.count += fill
+            self._free.put(block)
+            self._full.task_done()
+
+    def flush(self):
+        """Передать неполный блок на запись и дождаться записи всех блоков."""
+        if self._block is not None and self._fill:
+            self._hand_off()
+        self._full.join()
+        for f in self._files.values():
+            f.flush()
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {
+            'count': self.count,
+            'dropped': self.dropped,
+            'columns': {name: {'dtype': RECORD[name].base.str, 'shape': list(RECORD[name].shape)}
+                        for name in RECORD.names},
+        }
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def close(self):
+        self.flush()
+        self._full.put(None)
+        self._writer.join()
+        for f in self._files.values():
+            f.close()
+
+
+def open_recording(path):
+    """Колонки записи как np.memmap (только чтение): словарь поле -> массив (N, ...).
+
+    Число тактов - по размерам файлов колонок (наименьшее из них), а не по
+    счётчику в meta.json: у прерванного сеанса он остаётся нулевым.
+    """
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    columns = {}
+    sizes = {}
+    for name, info in meta['columns'].items():
+        row = np.dtype(info['dtype']).itemsize * int(np.prod(info['shape'], dtype=int))
+        sizes[name] = os.path.getsize(os.path.join(path, name + '.bin')) // row
+    count = min(sizes.values())
+    for name, info in meta['columns'].items():
+        shape = (count,) + tuple(info['shape'])
+        if count == 0:
+            columns[name] = np.zeros(shape, dtype=info['dtype'])
+            continue
+        columns[name] = np.memmap(os.path.join(path, name + '.bin'),
+                                  dtype=info['dtype'], mode='r', shape=shape)
+    return columns